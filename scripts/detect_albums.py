@@ -25,12 +25,11 @@ import json
 import logging
 import os
 import sys
-from collections import defaultdict
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from sqlalchemy import text
+from sqlalchemy import BigInteger, Float, Integer, Text, column, text
 
 from src.config import Config
 from src.db import create_adapter
@@ -38,47 +37,139 @@ from src.db import create_adapter
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
+# Rows fetched per round-trip while streaming messages
+STREAM_BATCH_SIZE = 5000
+# Album updates sent (and committed) per batch
+UPDATE_BATCH_SIZE = 1000
+
+# Epoch seconds of messages.date per dialect, so the album window check is a
+# plain float subtraction instead of a datetime/timedelta round-trip. Message
+# dates are whole seconds, so SQLite's integer strftime('%s') loses nothing.
+_EPOCH_EXPR = {
+    "postgresql": "EXTRACT(EPOCH FROM m.date)",
+    "sqlite": "CAST(strftime('%s', m.date) AS REAL)",
+}
+
+
+def _scan_media_messages(dialect: str):
+    """
+    Build the Core SELECT of the columns album detection reads.
+
+    has_grouped_id is a parse-free LIKE on the raw JSON text (the key is only
+    ever written with a value), so raw_data is only parsed for messages that end
+    up in an album. Already-grouped rows are kept rather than filtered out
+    because they still break up consecutive runs.
+    """
+    return text(f"""
+        SELECT m.id, m.chat_id, m.sender_id, {_EPOCH_EXPR[dialect]} AS ts,
+               CASE WHEN m.raw_data LIKE '%"grouped_id"%' THEN 1 ELSE 0 END AS has_grouped_id,
+               m.raw_data
+        FROM messages m
+        WHERE EXISTS (
+            SELECT 1 FROM media md
+            WHERE md.message_id = m.id AND md.chat_id = m.chat_id AND md.type IN ('photo', 'video')
+        )
+        ORDER BY m.chat_id, m.date, m.id
+    """).columns(
+        column("id", BigInteger),
+        column("chat_id", BigInteger),
+        column("sender_id", BigInteger),
+        column("ts", Float),
+        column("has_grouped_id", Integer),
+        column("raw_data", Text),
+    )
+
+
+_UPDATE_RAW_DATA = text("UPDATE messages SET raw_data = :raw_data WHERE id = :id AND chat_id = :chat_id")
+
+# PostgreSQL fast path: COPY the batch into a session-local staging table and
+# apply it with one UPDATE ... FROM. ON COMMIT DELETE ROWS empties it per batch.
+_CREATE_ALBUM_STAGE = text("""
+    CREATE TEMP TABLE IF NOT EXISTS _album_stage (
+        id BIGINT NOT NULL,
+        chat_id BIGINT NOT NULL,
+        raw_data TEXT
+    ) ON COMMIT DELETE ROWS
+""")
+_UPDATE_FROM_ALBUM_STAGE = text("""
+    UPDATE messages
+    SET raw_data = s.raw_data
+    FROM _album_stage s
+    WHERE messages.id = s.id AND messages.chat_id = s.chat_id
+""")
+
 
 async def _bulk_update_raw_data(session, updates: list):
     """
-    Bulk update raw_data for messages using a single SQL query.
+    Bulk update raw_data for messages.
+
+    PostgreSQL uses binary COPY into a temp staging table plus a single
+    UPDATE ... FROM; SQLite uses one parameterized executemany.
+
+    raw_data is a TEXT column that may hold malformed JSON, so the merged JSON
+    is built in Python rather than with json_set()/jsonb_set() on the server.
 
     Args:
         session: SQLAlchemy async session
-        updates: List of (chat_id, message_id, raw_data_json_str) tuples
+        updates: List of {"id", "chat_id", "raw_data"} parameter dicts
     """
     if not updates:
         return
 
-    dialect = session.bind.dialect.name
-
-    if dialect == "postgresql":
-        # PostgreSQL - UPDATE FROM VALUES
-        # Escape single quotes in JSON strings
-        values_str = ", ".join(
-            f"({chat_id}::bigint, {msg_id}::bigint, '{raw_data.replace(chr(39), chr(39) + chr(39))}'::text)"
-            for chat_id, msg_id, raw_data in updates
+    if session.bind.dialect.name == "postgresql":
+        # Creating the stage first also opens the transaction the COPY joins
+        await session.execute(_CREATE_ALBUM_STAGE)
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            "_album_stage",
+            records=[(u["id"], u["chat_id"], u["raw_data"]) for u in updates],
+            columns=["id", "chat_id", "raw_data"],
         )
-        query = text(f"""
-            UPDATE messages
-            SET raw_data = v.raw_data
-            FROM (VALUES {values_str}) AS v(chat_id, id, raw_data)
-            WHERE messages.chat_id = v.chat_id AND messages.id = v.id
-        """)
+        await session.execute(_UPDATE_FROM_ALBUM_STAGE)
     else:
-        # SQLite - multiple CASE WHEN
-        case_clauses = " ".join(
-            f"WHEN chat_id = {chat_id} AND id = {msg_id} THEN '{raw_data.replace(chr(39), chr(39) + chr(39))}'"
-            for chat_id, msg_id, raw_data in updates
-        )
-        where_clauses = " OR ".join(f"(chat_id = {chat_id} AND id = {msg_id})" for chat_id, msg_id, _ in updates)
-        query = text(f"""
-            UPDATE messages
-            SET raw_data = CASE {case_clauses} END
-            WHERE {where_clauses}
-        """)
+        await session.execute(_UPDATE_RAW_DATA, updates)
 
-    await session.execute(query)
+
+class AlbumDetector:
+    """
+    Single-pass album boundary detection over rows ordered by (chat_id, date, id).
+
+    Pure Python over plain tuples - no I/O, SQLAlchemy or JSON - so the hot loop
+    stays a tight state machine. Rows are (id, chat_id, sender_id, epoch_seconds,
+    has_grouped_id, ...); any trailing columns are carried along untouched.
+
+    A row continues the current album when it comes from the same chat and
+    sender within the time window. A row that already has a grouped_id ends the
+    current album and never joins one.
+    """
+
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self._album: list = []
+
+    def feed(self, row) -> list | None:
+        """Add the next row; return the album it closed (2+ rows), if any."""
+        album = self._album
+        if row[4]:
+            return self._close()
+        if album:
+            last = album[-1]
+            if row[1] == last[1] and row[2] == last[2] and abs(row[3] - last[3]) <= self.window_seconds:
+                album.append(row)
+                return None
+        closed = self._close()
+        self._album = [row]
+        return closed
+
+    def finish(self) -> list | None:
+        """Close and return the trailing album, if any."""
+        return self._close()
+
+    def _close(self) -> list | None:
+        album = self._album
+        self._album = []
+        return album if len(album) >= 2 else None
 
 
 async def detect_albums(dry_run: bool = False, window_seconds: int = 2):
@@ -100,134 +191,83 @@ async def detect_albums(dry_run: bool = False, window_seconds: int = 2):
     logger.info(f"Time window: {window_seconds} seconds")
     logger.info("")
 
-    async with db.db_manager.async_session_factory() as session:
-        from sqlalchemy import and_, select
-
-        from src.db.models import Media, Message
-
-        # Get all photo/video messages that don't have grouped_id, ordered by chat and date
-        # v6.0.0: Join with Media table to get media type
-        logger.info("Fetching photo/video messages without grouped_id...")
-
-        result = await session.execute(
-            select(Message)
-            .join(Media, and_(Media.message_id == Message.id, Media.chat_id == Message.chat_id))
-            .where(
-                Media.type.in_(["photo", "video"]),
-            )
-            .order_by(Message.chat_id, Message.date, Message.id)
-        )
-        messages = result.scalars().all()
-
-        logger.info(f"Found {len(messages)} photo/video messages to analyze")
-
-        # Group by chat
-        by_chat = defaultdict(list)
-        for msg in messages:
-            by_chat[msg.chat_id].append(msg)
-
-        logger.info(f"Spread across {len(by_chat)} chats")
-        logger.info("")
-
+    # Rows are streamed from a dedicated read session; album updates are
+    # flushed through a separate write session so commits never invalidate
+    # the open cursor.
+    async with (
+        db.db_manager.async_session_factory() as session,
+        db.db_manager.async_session_factory() as write_session,
+    ):
+        # Stream photo/video messages ordered by chat and date as plain tuples,
+        # selecting only the columns album detection needs (no ORM hydration).
+        # v6.0.0: media type lives in the media table
+        logger.info("Scanning photo/video messages...")
+
+        scan = _scan_media_messages(session.bind.dialect.name)
+        result = await session.stream(scan.execution_options(yield_per=STREAM_BATCH_SIZE))
+
+        messages_scanned = 0
+        chats_scanned = 0
+        prev_chat_id = None
         albums_detected = 0
         messages_grouped = 0
         already_grouped = 0
-        pending_updates = []  # Collect all updates for bulk execution
-        BATCH_SIZE = 1000
-
-        for chat_idx, (chat_id, chat_messages) in enumerate(by_chat.items()):
-            # Progress report every 100 chats
-            if chat_idx % 100 == 0 and chat_idx > 0:
-                logger.info(f"Progress: {chat_idx}/{len(by_chat)} chats, {albums_detected} albums found")
-                # Flush pending updates
-                if pending_updates and not dry_run:
-                    await _bulk_update_raw_data(session, pending_updates)
-                    await session.commit()
-                    pending_updates = []
-
-            # Skip chats with only 1 message
-            if len(chat_messages) < 2:
-                continue
-
-            # Detect albums within this chat
-            current_album = []
-
-            for i, msg in enumerate(chat_messages):
-                # Parse existing raw_data
+        pending_updates = []  # Collect updates for bulk execution
+        detector = AlbumDetector(window_seconds)
+
+        def flush_album(album: list) -> None:
+            """Queue grouped_id updates for a detected album and count it."""
+            nonlocal albums_detected, messages_grouped
+            grouped_id = album[0][0]  # Use first message ID as group ID
+
+            for album_mid, album_cid, _, _, _, album_raw in album:
                 try:
-                    raw_data = json.loads(msg.raw_data) if msg.raw_data else {}
+                    existing_raw = json.loads(album_raw) if album_raw else {}
                 except:
-                    raw_data = {}
-
-                # Skip if already has grouped_id
-                if raw_data.get("grouped_id"):
-                    already_grouped += 1
-                    # Finish current album if any
-                    if len(current_album) >= 2:
-                        albums_detected += 1
-                        messages_grouped += len(current_album)
-                    current_album = []
-                    continue
-
-                # Check if this message continues the current album
-                if current_album:
-                    last_msg = current_album[-1]
-                    time_diff = (msg.date - last_msg.date).total_seconds() if msg.date and last_msg.date else 999
-                    same_sender = msg.sender_id == last_msg.sender_id
-
-                    if same_sender and abs(time_diff) <= window_seconds:
-                        # Continue album
-                        current_album.append(msg)
-                    else:
-                        # End current album, start new potential album
-                        if len(current_album) >= 2:
-                            # This was an album - collect updates
-                            grouped_id = current_album[0].id  # Use first message ID as group ID
-
-                            for album_msg in current_album:
-                                try:
-                                    existing_raw = json.loads(album_msg.raw_data) if album_msg.raw_data else {}
-                                except:
-                                    existing_raw = {}
-                                existing_raw["grouped_id"] = grouped_id
-                                existing_raw["album_detected"] = True
-                                pending_updates.append((album_msg.chat_id, album_msg.id, json.dumps(existing_raw)))
-
-                            albums_detected += 1
-                            messages_grouped += len(current_album)
-
-                            if albums_detected <= 10:
-                                logger.info(f"  Album detected: {len(current_album)} items (msg {grouped_id})")
-
-                        # Start new potential album
-                        current_album = [msg]
-                else:
-                    # Start new potential album
-                    current_album = [msg]
-
-            # Handle last album in chat
-            if len(current_album) >= 2:
-                grouped_id = current_album[0].id
-
-                for album_msg in current_album:
-                    try:
-                        existing_raw = json.loads(album_msg.raw_data) if album_msg.raw_data else {}
-                    except:
-                        existing_raw = {}
-                    existing_raw["grouped_id"] = grouped_id
-                    existing_raw["album_detected"] = True
-                    pending_updates.append((album_msg.chat_id, album_msg.id, json.dumps(existing_raw)))
-
-                albums_detected += 1
-                messages_grouped += len(current_album)
-
-                if albums_detected <= 10:
-                    logger.info(f"  Album detected: {len(current_album)} items (msg {grouped_id})")
+                    existing_raw = {}
+                existing_raw["grouped_id"] = grouped_id
+                existing_raw["album_detected"] = True
+                pending_updates.append({"id": album_mid, "chat_id": album_cid, "raw_data": json.dumps(existing_raw)})
+
+            albums_detected += 1
+            messages_grouped += len(album)
+
+            if albums_detected <= 10:
+                logger.info(f"  Album detected: {len(album)} items (msg {grouped_id})")
+
+        async for row in result:
+            messages_scanned += 1
+
+            if row[1] != prev_chat_id:
+                prev_chat_id = row[1]
+                chats_scanned += 1
+                # Progress report every 100 chats
+                if chats_scanned % 100 == 0:
+                    logger.info(f"Progress: {chats_scanned} chats scanned, {albums_detected} albums found")
+
+            # Flush pending updates in fixed-size batches
+            if len(pending_updates) >= UPDATE_BATCH_SIZE:
+                if not dry_run:
+                    await _bulk_update_raw_data(write_session, pending_updates)
+                    await write_session.commit()
+                pending_updates = []
+
+            if row[4]:
+                already_grouped += 1
+
+            album = detector.feed(row)
+            if album:
+                flush_album(album)
+
+        # Handle last album of the last chat
+        album = detector.finish()
+        if album:
+            flush_album(album)
 
         # Flush remaining updates
         if pending_updates and not dry_run:
-            await _bulk_update_raw_data(session, pending_updates)
-            await session.commit()
+            await _bulk_update_raw_data(write_session, pending_updates)
+            await write_session.commit()
             logger.info("")
             logger.info("✅ Database changes committed")
 
@@ -236,6 +276,8 @@ async def detect_albums(dry_run: bool = False, window_seconds: int = 2):
         logger.info("=" * 70)
         logger.info("SUMMARY")
         logger.info("=" * 70)
+        logger.info(f"Messages scanned:       {messages_scanned}")
+        logger.info(f"Chats scanned:          {chats_scanned}")
         logger.info(f"Albums detected:        {albums_detected}")
         logger.info(f"Messages grouped:       {messages_grouped}")
         logger.info(f"Already had grouped_id: {already_grouped}")
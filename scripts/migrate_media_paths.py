@@ -32,6 +32,7 @@ BACKUP FIRST!
 
 import argparse
 import asyncio
+import errno
 import logging
 import os
 import re
@@ -43,12 +44,20 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
+# Chats processed between database commits
+COMMIT_EVERY_CHATS = 50
+
+# Chat avatars live under <media_path>/avatars/chats
+_CHAT_AVATARS_SUBDIR = ("avatars", "chats")
+
+# Legacy avatar filename: positive_id_photoid.jpg
+_AVATAR_RE = re.compile(r"^(\d+)_(\d+)\.jpg$")
+
 
 async def get_group_channel_chats(session) -> list:
     """Get all chats that are groups/channels/supergroups (have negative IDs)."""
@@ -117,51 +126,62 @@ async def bulk_update_media_paths(session, chat_id: int, old_folder: str, new_fo
     return {"messages": msg_updated, "media": media_updated}
 
 
+def _rename(src: str, dst: str) -> None:
+    """Rename src to dst, falling back to shutil.move only across filesystems."""
+    try:
+        os.rename(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
+
+
 async def migrate_avatars(media_path: str, dry_run: bool) -> dict:
     """Migrate avatar files from positive to negative IDs."""
     stats = {"renamed": 0, "skipped": 0, "errors": 0}
 
-    chats_avatar_dir = os.path.join(media_path, "avatars", "chats")
+    chats_avatar_dir = os.path.join(media_path, *_CHAT_AVATARS_SUBDIR)
     if not os.path.exists(chats_avatar_dir):
         logger.info("No avatars/chats directory found, skipping avatar migration")
         return stats
 
     # Pattern: positive_id_photoid.jpg (e.g., 11482744_49777919797605248.jpg)
     # We need to rename to: -11482744_49777919797605248.jpg
-    for filename in os.listdir(chats_avatar_dir):
-        if not filename.endswith(".jpg"):
-            continue
-
-        # Check if it starts with a positive number (no dash)
-        match = re.match(r"^(\d+)_(\d+)\.jpg$", filename)
-        if not match:
-            continue  # Already negative or different format
-
-        old_id = match.group(1)
-        photo_id = match.group(2)
-        new_filename = f"-{old_id}_{photo_id}.jpg"
-
-        old_path = os.path.join(chats_avatar_dir, filename)
-        new_path = os.path.join(chats_avatar_dir, new_filename)
-
-        if os.path.exists(new_path):
-            # The avatar filename IS the chat id ("-<chat_id>_<photo_id>.jpg"),
-            # so it cannot be logged (#274 follow-up).
-            logger.debug("  Avatar already migrated")
-            stats["skipped"] += 1
-            continue
-
-        if dry_run:
-            logger.info("  [DRY RUN] Would rename an avatar to marked format")
-            stats["renamed"] += 1
-        else:
-            try:
-                shutil.move(old_path, new_path)
-                logger.info("  Renamed an avatar to marked format")
+    with os.scandir(chats_avatar_dir) as it:
+        for entry in it:
+            if not entry.name.endswith(".jpg") or not entry.is_file(follow_symlinks=False):
+                continue
+
+            # Check if it starts with a positive number (no dash)
+            match = _AVATAR_RE.match(entry.name)
+            if not match:
+                continue  # Already negative or different format
+
+            old_id = match.group(1)
+            photo_id = match.group(2)
+            new_filename = f"-{old_id}_{photo_id}.jpg"
+
+            # Plain concatenation: os.path.join is measurable in a per-file loop
+            new_path = f"{chats_avatar_dir}{os.sep}{new_filename}"
+
+            if os.path.lexists(new_path):
+                # The avatar filename IS the chat id ("-<chat_id>_<photo_id>.jpg"),
+                # so it cannot be logged (#274 follow-up).
+                logger.debug("  Avatar already migrated")
+                stats["skipped"] += 1
+                continue
+
+            if dry_run:
+                logger.info("  [DRY RUN] Would rename an avatar to marked format")
                 stats["renamed"] += 1
-            except Exception as e:
-                logger.error(f"  Error renaming an avatar: {type(e).__name__}")
-                stats["errors"] += 1
+            else:
+                try:
+                    _rename(entry.path, new_path)
+                    logger.info("  Renamed an avatar to marked format")
+                    stats["renamed"] += 1
+                except Exception as e:
+                    logger.error(f"  Error renaming an avatar: {type(e).__name__}")
+                    stats["errors"] += 1
 
     return stats
 
@@ -190,9 +210,9 @@ async def migrate(db_url: str, media_path: str, dry_run: bool = True):
     logger.info(f"Media path: {media_path}")
     logger.info("")
 
-    # Create async engine
-    engine = create_async_engine(db_url, echo=False)
-    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    # Create async engine - a one-shot script only ever needs a single connection
+    engine = create_async_engine(db_url, echo=False, pool_size=1, max_overflow=0)
+    async_session = async_sessionmaker(engine, expire_on_commit=False)
 
     stats = {"chats_processed": 0, "folders_renamed": 0, "paths_updated": 0, "avatars_renamed": 0, "errors": 0}
 
@@ -238,15 +258,15 @@ async def migrate(db_url: str, media_path: str, dry_run: bool = True):
                 logger.info("   ⚠️  Both old and new media folders exist for this chat; merging")
 
                 if not dry_run:
-                    for item in os.listdir(old_folder_path):
-                        src = os.path.join(old_folder_path, item)
-                        dst = os.path.join(new_folder_path, item)
-                        if not os.path.exists(dst):
-                            # File doesn't exist in destination - move it
-                            shutil.move(src, dst)
-                        else:
-                            # File exists in both - delete from old folder (keep new)
-                            os.remove(src)
+                    with os.scandir(old_folder_path) as it:
+                        for entry in it:
+                            dst = f"{new_folder_path}{os.sep}{entry.name}"
+                            if not os.path.lexists(dst):
+                                # File doesn't exist in destination - move it
+                                _rename(entry.path, dst)
+                            else:
+                                # File exists in both - delete from old folder (keep new)
+                                os.remove(entry.path)
                     # Remove old folder (should be empty now)
                     try:
                         os.rmdir(old_folder_path)
@@ -260,11 +280,16 @@ async def migrate(db_url: str, media_path: str, dry_run: bool = True):
                 if dry_run:
                     logger.info("   [DRY RUN] Would rename this chat's media folder to marked format")
                 else:
-                    shutil.move(old_folder_path, new_folder_path)
+                    _rename(old_folder_path, new_folder_path)
                     logger.info("   Renamed this chat's media folder to marked format")
 
                 stats["folders_renamed"] += 1
 
+            # Commit periodically so a long run keeps its transaction bounded and an
+            # interrupted run loses little work (the LIKE filters make re-runs safe)
+            if not dry_run and stats["chats_processed"] % COMMIT_EVERY_CHATS == 0:
+                await session.commit()
+
         # Migrate avatars
         logger.info("")
         logger.info("📷 Migrating avatars...")
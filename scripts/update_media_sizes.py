@@ -27,19 +27,52 @@ import sys
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from sqlalchemy import text
+from sqlalchemy import select, text
 
 from src.config import Config
 from src.db import create_adapter
+from src.db.models import Media
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
+# Rows fetched per round-trip while streaming media records
+STREAM_BATCH_SIZE = 5000
+
+
+def _stat_size(path: str) -> int | None:
+    """Return the size of a file with a single stat() call, or None if it does not exist."""
+    try:
+        return os.stat(path).st_size
+    except FileNotFoundError, NotADirectoryError:
+        return None
+
+
+# PostgreSQL fast path: COPY the batch into a session-local staging table and
+# apply it with one UPDATE ... FROM. ON COMMIT DELETE ROWS empties it per batch.
+_CREATE_SIZE_STAGE = text("""
+    CREATE TEMP TABLE IF NOT EXISTS _size_stage (
+        id VARCHAR(255) NOT NULL,
+        size BIGINT NOT NULL
+    ) ON COMMIT DELETE ROWS
+""")
+_UPDATE_FROM_SIZE_STAGE = text("""
+    UPDATE media
+    SET file_size = s.size
+    FROM _size_stage s
+    WHERE media.id = s.id AND media.file_size IS DISTINCT FROM s.size
+""")
+_UPDATE_FILE_SIZE = text("UPDATE media SET file_size = :size WHERE id = :id AND file_size IS NOT :size")
+
 
 async def _bulk_update_sizes(session, updates: list):
     """
-    Bulk update file sizes using a single SQL query with CASE statement.
-    Much faster than individual UPDATEs - does 1000 rows in one round-trip!
+    Bulk update file sizes for a batch of media records.
+
+    PostgreSQL uses binary COPY into a temp staging table plus a single
+    UPDATE ... FROM; SQLite uses one parameterized executemany by primary key.
+    Rows whose stored size already matches are left untouched, so --force
+    reruns only write the sizes that actually changed.
 
     Args:
         session: SQLAlchemy async session
@@ -48,33 +81,22 @@ async def _bulk_update_sizes(session, updates: list):
     if not updates:
         return
 
-    # Build a VALUES clause and UPDATE with JOIN
-    # PostgreSQL: UPDATE media SET file_size = v.size FROM (VALUES ...) AS v(id, size) WHERE media.id = v.id
-    # SQLite: Use CASE WHEN approach
-
     # Detect database type from connection
     dialect = session.bind.dialect.name
 
     if dialect == "postgresql":
-        # PostgreSQL - use UPDATE FROM VALUES (fastest)
-        values_str = ", ".join(f"('{mid}', {size})" for mid, size in updates)
-        query = text(f"""
-            UPDATE media
-            SET file_size = v.size::bigint
-            FROM (VALUES {values_str}) AS v(id, size)
-            WHERE media.id = v.id
-        """)
+        # Creating the stage first also opens the transaction the COPY joins
+        await session.execute(_CREATE_SIZE_STAGE)
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            "_size_stage",
+            records=updates,
+            columns=["id", "size"],
+        )
+        await session.execute(_UPDATE_FROM_SIZE_STAGE)
     else:
-        # SQLite - use CASE WHEN
-        case_clauses = " ".join(f"WHEN '{mid}' THEN {size}" for mid, size in updates)
-        ids = ", ".join(f"'{mid}'" for mid, _ in updates)
-        query = text(f"""
-            UPDATE media
-            SET file_size = CASE id {case_clauses} END
-            WHERE id IN ({ids})
-        """)
-
-    await session.execute(query)
+        await session.execute(_UPDATE_FILE_SIZE, [{"id": mid, "size": size} for mid, size in updates])
 
 
 async def update_media_sizes(dry_run: bool = False, force: bool = False):
@@ -97,32 +119,34 @@ async def update_media_sizes(dry_run: bool = False, force: bool = False):
     logger.info(f"Dry run: {dry_run}")
     logger.info(f"Force update all: {force}")
 
-    # Get media records that need updating
-    async with db.db_manager.async_session_factory() as session:
-        from sqlalchemy import select
-
-        from src.db.models import Media
-
+    # Get media records that need updating. Rows are streamed from a dedicated
+    # read session; size updates are flushed through a separate write session so
+    # commits never invalidate the open cursor.
+    async with (
+        db.db_manager.async_session_factory() as session,
+        db.db_manager.async_session_factory() as write_session,
+    ):
         # Media types that have actual downloadable files
         DOWNLOADABLE_TYPES = ["photo", "video", "audio", "voice", "document", "sticker", "animation"]
         # Types without files (just metadata): geo, poll, contact, venue, etc.
 
-        # Build query - only downloadable types, exclude non-file types
+        # Build query - only downloadable types, exclude non-file types.
+        # Only the columns needed to locate the file are selected (no ORM hydration).
         base_filter = Media.type.in_(DOWNLOADABLE_TYPES)
+        query = select(Media.id, Media.file_path, Media.chat_id, Media.file_name)
 
         if force:
-            query = select(Media).where(base_filter)
+            query = query.where(base_filter)
             logger.info("Fetching ALL downloadable media records...")
         else:
-            query = select(Media).where(base_filter, (Media.file_size == None) | (Media.file_size == 0))
+            query = query.where(base_filter, (Media.file_size == None) | (Media.file_size == 0))
             logger.info("Fetching downloadable media records with missing file sizes...")
 
         logger.info("(Skipping non-file types: geo, poll, contact, venue, etc.)")
 
-        result = await session.execute(query)
-        media_records = result.scalars().all()
+        result = await session.stream(query.execution_options(yield_per=STREAM_BATCH_SIZE))
 
-        logger.info(f"Found {len(media_records)} records to process")
+        processed_count = 0
 
         updated_count = 0
         missing_count = 0
@@ -132,59 +156,81 @@ async def update_media_sizes(dry_run: bool = False, force: bool = False):
         BATCH_SIZE = 1000
         pending_updates = []  # Collect updates for bulk execution
 
-        for i, media in enumerate(media_records):
+        # Paths are built by plain concatenation; per-chat directories are cached
+        # because most chats own many files.
+        base = media_base_path.rstrip(os.sep) + os.sep
+        chat_dirs = {}  # chat_id -> "<media_base_path>/<chat_id>/"
+
+        stat_window = []  # (media_id, full_path) pairs awaiting a stat() call
+
+        async def stat_pending_files() -> None:
+            """Stat the queued paths concurrently off the event loop and queue their sizes."""
+            nonlocal updated_count, missing_count, error_count, total_size_added
+            sizes = await asyncio.gather(
+                *(asyncio.to_thread(_stat_size, full_path) for _, full_path in stat_window),
+                return_exceptions=True,
+            )
+            for (media_id, full_path), file_size in zip(stat_window, sizes, strict=True):
+                if isinstance(file_size, Exception):
+                    logger.error(f"Error processing {os.path.basename(full_path)}: {type(file_size).__name__}")
+                    error_count += 1
+                elif file_size is None:
+                    missing_count += 1
+                    if missing_count <= 10:  # Only log first 10 missing files
+                        logger.warning(f"File not found: {full_path}")
+                else:
+                    pending_updates.append((media_id, file_size))
+                    updated_count += 1
+                    total_size_added += file_size
+            stat_window.clear()
+
+        async for media_id, file_path, chat_id, file_name in result:
             # Flush batch and report progress
-            if i % BATCH_SIZE == 0 and i > 0:
+            if processed_count % BATCH_SIZE == 0 and processed_count > 0:
+                await stat_pending_files()
                 if pending_updates and not dry_run:
-                    # BULK UPDATE using VALUES - single query for entire batch!
-                    await _bulk_update_sizes(session, pending_updates)
-                    await session.commit()
+                    # Bulk update - one statement for the entire batch
+                    await _bulk_update_sizes(write_session, pending_updates)
+                    await write_session.commit()
                     pending_updates = []
                 logger.info(
-                    f"Progress: {i}/{len(media_records)} ({updated_count} updated, {missing_count} missing) - committed"
+                    f"Progress: {processed_count} processed ({updated_count} updated, {missing_count} missing) - committed"
                 )
+            processed_count += 1
 
             # Construct full path
-            if media.file_path:
+            if file_path:
                 # file_path might be absolute or relative
-                if media.file_path.startswith("/"):
-                    full_path = media.file_path
+                if file_path.startswith("/"):
+                    full_path = file_path
                 else:
-                    full_path = os.path.join(media_base_path, media.file_path)
+                    full_path = f"{base}{file_path}"
             else:
                 # Fallback: construct from chat_id and file_name
-                if media.chat_id and media.file_name:
-                    full_path = os.path.join(media_base_path, str(media.chat_id), media.file_name)
+                if chat_id and file_name:
+                    chat_dir = chat_dirs.get(chat_id)
+                    if chat_dir is None:
+                        chat_dir = chat_dirs[chat_id] = f"{base}{chat_id}{os.sep}"
+                    full_path = f"{chat_dir}{file_name}"
                 else:
                     error_count += 1
                     continue
 
-            # Check if file exists and get size
-            if os.path.exists(full_path):
-                try:
-                    file_size = os.path.getsize(full_path)
-                    pending_updates.append((media.id, file_size))
-                    updated_count += 1
-                    total_size_added += file_size
-                except Exception as e:
-                    logger.error(f"Error processing {os.path.basename(full_path)}: {type(e).__name__}")
-                    error_count += 1
-            else:
-                missing_count += 1
-                if missing_count <= 10:  # Only log first 10 missing files
-                    logger.warning(f"File not found: {full_path}")
+            # Sizes are looked up per batch, see stat_pending_files()
+            stat_window.append((media_id, full_path))
 
         # Flush remaining updates
+        await stat_pending_files()
         if pending_updates and not dry_run:
-            await _bulk_update_sizes(session, pending_updates)
-            await session.commit()
+            await _bulk_update_sizes(write_session, pending_updates)
+            await write_session.commit()
             logger.info("Final batch committed to database")
 
         # Summary
         logger.info("=" * 60)
         logger.info("SUMMARY")
         logger.info("=" * 60)
-        logger.info(f"Total records processed: {len(media_records)}")
+        logger.info(f"Total records processed: {processed_count}")
         logger.info(f"Updated: {updated_count}")
         logger.info(f"Missing files: {missing_count}")
         logger.info(f"Errors: {error_count}")
@@ -18,7 +18,7 @@ from datetime import datetime
 from functools import wraps
 from typing import Any
 
-from sqlalchemy import and_, delete, exists, func, literal, or_, select, text, union_all, update
+from sqlalchemy import and_, case, delete, exists, func, insert, literal, or_, select, text, union_all, update
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
@@ -45,6 +45,40 @@ from .models import (
 
 logger = logging.getLogger(__name__)
 
+# Rows per multi-row message INSERT in insert_messages_batch. At ~18 bound
+# columns per row this stays well under SQLite's and asyncpg's 32k parameter caps.
+_MESSAGE_INSERT_CHUNK = 500
+
+# Rows per multi-row user upsert in upsert_users_batch (7 bound columns per row).
+_USER_UPSERT_CHUNK = 500
+
+# Rows fetched per cursor round-trip by the streaming export generators.
+_EXPORT_YIELD_PER = 1000
+
+# Rendered-message rows for the viewer: the message's own columns plus sender
+# names and media, as plain Core rows. Selecting columns rather than the Message
+# entity skips ORM instance construction and identity-map work per row;
+# _message_to_dict reads the row by attribute either way.
+_VIEWER_MESSAGE_SELECT = (
+    select(
+        *Message.__table__.c,
+        User.first_name,
+        User.last_name,
+        User.username,
+        Media.id.label("media_id"),
+        Media.type.label("media_type"),
+        Media.file_path.label("media_file_path"),
+        Media.file_name.label("media_file_name"),
+        Media.file_size.label("media_file_size"),
+        Media.mime_type.label("media_mime_type"),
+        Media.width.label("media_width"),
+        Media.height.label("media_height"),
+        Media.duration.label("media_duration"),
+    )
+    .outerjoin(User, Message.sender_id == User.id)
+    .outerjoin(Media, and_(Media.message_id == Message.id, Media.chat_id == Message.chat_id))
+)
+
 
 def _strip_tz(dt: datetime | None) -> datetime | None:
     """Strip timezone info from datetime for PostgreSQL compatibility."""
@@ -235,6 +269,14 @@ class DatabaseAdapter:
             return sqlite_insert(Message).values(**values).on_conflict_do_nothing(index_elements=["id", "chat_id"])
         return pg_insert(Message).values(**values).on_conflict_do_nothing(index_elements=["id", "chat_id"])
 
+    def _insert_messages_stmt(self, rows: list[dict[str, Any]]):
+        """Multi-row insert that skips existing messages and returns the keys it inserted."""
+        if self._is_sqlite:
+            stmt = sqlite_insert(Message).values(rows).on_conflict_do_nothing(index_elements=["id", "chat_id"])
+        else:
+            stmt = pg_insert(Message).values(rows).on_conflict_do_nothing(index_elements=["id", "chat_id"])
+        return stmt.returning(Message.id, Message.chat_id)
+
     def _insert_message_version_stmt(self, values: dict[str, Any]):
         if self._is_sqlite:
             return sqlite_insert(MessageVersion).values(**values).on_conflict_do_nothing(index_elements=["change_hash"])
@@ -541,7 +583,7 @@ class DatabaseAdapter:
             # This prevents partial upserts (e.g. from the listener) from resetting
             # is_forum/is_archived to their defaults.
             update_set = {
-                "updated_at": utcnow_naive(),
+                "updated_at": values["updated_at"],
             }
             # Always update these basic metadata fields
             for field in (
@@ -591,14 +633,19 @@ class DatabaseAdapter:
             folder_id: If set, only chats in this folder
         """
         async with self.db_manager.async_session_factory() as session:
-            # Subquery for last message date
-            subq = (
-                select(Message.chat_id, func.max(Message.date).label("last_message_date"))
-                .group_by(Message.chat_id)
-                .subquery()
+            # Last message date per chat as a correlated MAX: each chat is one probe
+            # of idx_messages_chat_date_desc, instead of aggregating the whole
+            # messages table with GROUP BY before the join.
+            last_message_date = (
+                select(func.max(Message.date))
+                .where(Message.chat_id == Chat.id)
+                .correlate(Chat)
+                .scalar_subquery()
+                .label("last_message_date")
             )
 
-            stmt = select(Chat, subq.c.last_message_date).outerjoin(subq, Chat.id == subq.c.chat_id)
+            # Plain column rows: each result maps straight to the returned dict
+            stmt = select(*Chat.__table__.c, last_message_date)
 
             # Filter by folder membership
             if folder_id is not None:
@@ -625,35 +672,15 @@ class DatabaseAdapter:
                     )
                 )
 
-            # Order by last message date
-            stmt = stmt.order_by(subq.c.last_message_date.is_(None), subq.c.last_message_date.desc())
+            # Order by last message date, chats without messages last
+            stmt = stmt.order_by(last_message_date.desc().nulls_last())
 
             # Apply pagination if limit is specified
             if limit is not None:
                 stmt = stmt.limit(limit).offset(offset)
 
             result = await session.execute(stmt)
-            chats = []
-            for row in result:
-                chat_dict = {
-                    "id": row.Chat.id,
-                    "type": row.Chat.type,
-                    "title": row.Chat.title,
-                    "username": row.Chat.username,
-                    "first_name": row.Chat.first_name,
-                    "last_name": row.Chat.last_name,
-                    "phone": row.Chat.phone,
-                    "description": row.Chat.description,
-                    "participants_count": row.Chat.participants_count,
-                    "is_forum": row.Chat.is_forum,
-                    "is_archived": row.Chat.is_archived,
-                    "last_synced_message_id": row.Chat.last_synced_message_id,
-                    "created_at": row.Chat.created_at,
-                    "updated_at": row.Chat.updated_at,
-                    "last_message_date": row.last_message_date,
-                }
-                chats.append(chat_dict)
-            return chats
+            return [dict(row) for row in result.mappings()]
 
     async def get_chat_count(
         self, search: str = None, archived: bool | None = None, folder_id: int | None = None
@@ -695,48 +722,67 @@ class DatabaseAdapter:
 
     # ========== User Operations ==========
 
-    @retry_on_locked()
-    async def upsert_user(self, user_data: dict[str, Any]) -> None:
-        """Insert or update a user record."""
-        async with self.db_manager.async_session_factory() as session:
-            values = {
+    _USER_UPSERT_COLUMNS = ("username", "first_name", "last_name", "phone", "is_bot")
+
+    def _upsert_users_stmt(self, users: list[dict[str, Any]]):
+        """Build the dialect-specific multi-row upsert for user records.
+
+        The conflict update only fires when a profile field actually changed, so
+        re-seeing the same sender on every sync leaves the stored row (and its
+        updated_at) untouched instead of rewriting it. User ids must be unique
+        within one statement (PostgreSQL refuses to update a row twice).
+        """
+        now = utcnow_naive()
+        rows = [
+            {
                 "id": user_data["id"],
                 "username": user_data.get("username"),
                 "first_name": user_data.get("first_name"),
                 "last_name": user_data.get("last_name"),
                 "phone": user_data.get("phone"),
                 "is_bot": 1 if user_data.get("is_bot") else 0,
-                "updated_at": utcnow_naive(),
+                "updated_at": now,
             }
+            for user_data in users
+        ]
 
-            if self._is_sqlite:
-                stmt = sqlite_insert(User).values(**values)
-                stmt = stmt.on_conflict_do_update(
-                    index_elements=["id"],
-                    set_={
-                        "username": stmt.excluded.username,
-                        "first_name": stmt.excluded.first_name,
-                        "last_name": stmt.excluded.last_name,
-                        "phone": stmt.excluded.phone,
-                        "is_bot": stmt.excluded.is_bot,
-                        "updated_at": utcnow_naive(),
-                    },
-                )
-            else:
-                stmt = pg_insert(User).values(**values)
-                stmt = stmt.on_conflict_do_update(
-                    index_elements=["id"],
-                    set_={
-                        "username": stmt.excluded.username,
-                        "first_name": stmt.excluded.first_name,
-                        "last_name": stmt.excluded.last_name,
-                        "phone": stmt.excluded.phone,
-                        "is_bot": stmt.excluded.is_bot,
-                        "updated_at": utcnow_naive(),
-                    },
-                )
+        if self._is_sqlite:
+            stmt = sqlite_insert(User).values(rows)
+        else:
+            stmt = pg_insert(User).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={
+                **{col: stmt.excluded[col] for col in self._USER_UPSERT_COLUMNS},
+                "updated_at": stmt.excluded.updated_at,
+            },
+            where=or_(
+                *(User.__table__.c[col].is_distinct_from(stmt.excluded[col]) for col in self._USER_UPSERT_COLUMNS)
+            ),
+        )
+
+    @retry_on_locked()
+    async def upsert_user(self, user_data: dict[str, Any]) -> None:
+        """Insert or update a user record."""
+        async with self.db_manager.async_session_factory() as session:
+            await session.execute(self._upsert_users_stmt([user_data]))
+            await session.commit()
+
+    @retry_on_locked()
+    async def upsert_users_batch(self, users: list[dict[str, Any]]) -> None:
+        """Insert or update multiple user records in a single transaction.
+
+        Users are written with one multi-row upsert per _USER_UPSERT_CHUNK rows.
+        A user id repeated in the list keeps its last snapshot.
+        """
+        unique_users = list({user_data["id"]: user_data for user_data in users}.values())
+        if not unique_users:
+            return
+
+        async with self.db_manager.async_session_factory() as session:
+            for i in range(0, len(unique_users), _USER_UPSERT_CHUNK):
+                await session.execute(self._upsert_users_stmt(unique_users[i : i + _USER_UPSERT_CHUNK]))
 
-            await session.execute(stmt)
             await session.commit()
 
     # ========== Message Operations ==========
@@ -755,14 +801,31 @@ class DatabaseAdapter:
     async def insert_messages_batch(self, messages_data: list[dict[str, Any]]) -> None:
         """Insert multiple message records in a single transaction.
 
+        New messages are written with one multi-row INSERT per chunk; only the
+        rows that already existed fall back to the per-row update path of
+        insert_message().
+
         v6.0.0: media_type, media_id, media_path removed - use insert_media() separately.
         """
         if not messages_data:
             return
 
         async with self.db_manager.async_session_factory() as session:
-            for m in messages_data:
-                await self._insert_or_update_message(session, m)
+            for start in range(0, len(messages_data), _MESSAGE_INSERT_CHUNK):
+                chunk = messages_data[start : start + _MESSAGE_INSERT_CHUNK]
+                rows = [self._message_values(m) for m in chunk]
+                result = await session.execute(self._insert_messages_stmt(rows))
+                inserted = {(row.id, row.chat_id) for row in result}
+
+                # Walk the chunk in order: the first occurrence of an inserted key
+                # is done; existing rows and repeats within the batch are merged
+                # exactly as a sequence of insert_message() calls would.
+                for message_data, values in zip(chunk, rows, strict=True):
+                    key = (values["id"], values["chat_id"])
+                    if key in inserted:
+                        inserted.discard(key)
+                    else:
+                        await self._apply_existing_message_update(session, message_data, values)
 
             await session.commit()
 
@@ -844,45 +907,65 @@ class DatabaseAdapter:
             row = result.first()
             return row[0] if row else None
 
-    @retry_on_locked()
     async def delete_message(self, chat_id: int, message_id: int) -> None:
         """Delete a specific message and its media."""
+        await self.delete_messages(chat_id, [message_id])
+
+    @retry_on_locked()
+    async def delete_messages(self, chat_id: int, message_ids: Iterable[int]) -> None:
+        """Delete messages of one chat, with their versions, media and reactions, in one transaction.
+
+        One statement per table covers every id, so a multi-message deletion
+        event costs four round-trips instead of four per message.
+        """
+        message_ids = list(message_ids)
+        if not message_ids:
+            return
         async with self.db_manager.async_session_factory() as session:
             # Delete previous versions
             await session.execute(
                 delete(MessageVersion).where(
-                    and_(MessageVersion.chat_id == chat_id, MessageVersion.message_id == message_id)
+                    and_(MessageVersion.chat_id == chat_id, MessageVersion.message_id.in_(message_ids))
                 )
             )
             # Delete associated media
-            await session.execute(delete(Media).where(and_(Media.chat_id == chat_id, Media.message_id == message_id)))
+            await session.execute(
+                delete(Media).where(and_(Media.chat_id == chat_id, Media.message_id.in_(message_ids)))
+            )
             # Delete reactions
             await session.execute(
-                delete(Reaction).where(and_(Reaction.chat_id == chat_id, Reaction.message_id == message_id))
+                delete(Reaction).where(and_(Reaction.chat_id == chat_id, Reaction.message_id.in_(message_ids)))
             )
-            # Delete the message
-            await session.execute(delete(Message).where(and_(Message.chat_id == chat_id, Message.id == message_id)))
+            # Delete the messages
+            await session.execute(delete(Message).where(and_(Message.chat_id == chat_id, Message.id.in_(message_ids))))
             await session.commit()
-            logger.debug(f"Deleted message {message_id}")
+            logger.debug(f"Deleted {len(message_ids)} message(s)")
 
-    @retry_on_locked()
     async def mark_message_deleted(self, chat_id: int, message_id: int, deleted_at: datetime | None = None) -> None:
         """Mark a message as deleted on Telegram while keeping archive content."""
+        await self.mark_messages_deleted(chat_id, [message_id], deleted_at)
+
+    @retry_on_locked()
+    async def mark_messages_deleted(
+        self, chat_id: int, message_ids: Iterable[int], deleted_at: datetime | None = None
+    ) -> None:
+        """Mark messages of one chat as deleted on Telegram with a single UPDATE."""
+        message_ids = list(message_ids)
+        if not message_ids:
+            return
         deleted_at = _strip_tz(deleted_at) or utcnow_naive()
         async with self.db_manager.async_session_factory() as session:
             result = await session.execute(
                 update(Message)
-                .where(and_(Message.chat_id == chat_id, Message.id == message_id))
+                .where(and_(Message.chat_id == chat_id, Message.id.in_(message_ids)))
                 .values(
                     is_deleted=1,
                     deleted_at=func.coalesce(Message.deleted_at, deleted_at),
                 )
             )
             await session.commit()
-            if result.rowcount:
-                logger.debug(f"Marked message {message_id} as deleted")
-            else:
-                logger.debug(f"Soft-delete no-op: message {message_id} not in archive")
+            # rowcount < len(message_ids) means some ids were never archived (no-op).
+            logger.debug(f"Marked {result.rowcount} of {len(message_ids)} message(s) as deleted")
 
     async def resolve_message_chat_id(self, message_id: int) -> int | None:
         """
@@ -975,7 +1058,7 @@ class DatabaseAdapter:
                 logger.info(f"Backfilled is_outgoing=1 for {result.rowcount} messages from owner {owner_id}")
 
     def _message_to_dict(self, message: Message) -> dict[str, Any]:
-        """Convert Message model to dictionary.
+        """Convert a Message model (or a row of its columns) to dictionary.
 
         v6.0.0: media_type, media_id, media_path removed - use media_items relationship.
         """
@@ -1074,7 +1157,9 @@ class DatabaseAdapter:
         materializes an entire edit history in memory.
         """
         async with self.db_manager.async_session_factory() as session:
-            result = await session.stream(self._message_versions_query(chat_id))
+            result = await session.stream(
+                self._message_versions_query(chat_id).execution_options(yield_per=_EXPORT_YIELD_PER)
+            )
             async for row in result.scalars():
                 yield self._message_version_to_dict(row)
 
@@ -1085,9 +1170,17 @@ class DatabaseAdapter:
             Dict with keys: messages, media_files, total_size_bytes, first_message_date, last_message_date
         """
         async with self.db_manager.async_session_factory() as session:
-            # Message count
-            msg_result = await session.execute(select(func.count(Message.id)).where(Message.chat_id == chat_id))
-            message_count = msg_result.scalar() or 0
+            # Message count and first/last message dates in one pass over the
+            # chat's (chat_id, date) index
+            msg_result = await session.execute(
+                select(func.count(Message.id), func.min(Message.date), func.max(Message.date)).where(
+                    Message.chat_id == chat_id
+                )
+            )
+            msg_row = msg_result.one()
+            message_count = msg_row[0] or 0
+            first_message = msg_row[1]
+            last_message = msg_row[2]
 
             # Media count and total size
             media_result = await session.execute(
@@ -1099,14 +1192,6 @@ class DatabaseAdapter:
             media_count = media_row[0] or 0
             total_size = media_row[1] or 0
 
-            # First and last message dates
-            date_result = await session.execute(
-                select(func.min(Message.date), func.max(Message.date)).where(Message.chat_id == chat_id)
-            )
-            date_row = date_result.one()
-            first_message = date_row[0]
-            last_message = date_row[1]
-
             return {
                 "chat_id": chat_id,
                 "messages": int(message_count),
@@ -1119,6 +1204,76 @@ class DatabaseAdapter:
 
     # ========== Media Operations ==========
 
+    def _insert_media_stmt(self, media_data: dict[str, Any]):
+        """Build the media upsert statement shared by insert_media and insert_media_batch."""
+        values = {
+            "id": media_data["id"],
+            "message_id": media_data.get("message_id"),
+            "chat_id": media_data.get("chat_id"),
+            "type": media_data["type"],
+            "file_name": media_data.get("file_name"),
+            "file_path": media_data.get("file_path"),
+            "file_size": media_data.get("file_size"),
+            "mime_type": media_data.get("mime_type"),
+            "width": media_data.get("width"),
+            "height": media_data.get("height"),
+            "duration": media_data.get("duration"),
+            "content_hash": media_data.get("content_hash"),
+            "downloaded": 1 if media_data.get("downloaded") else 0,
+            "download_date": media_data.get("download_date"),
+        }
+
+        stmt = sqlite_insert(Media).values(**values) if self._is_sqlite else pg_insert(Media).values(**values)
+
+        # On conflict, a writer that has NO value for a column must not blank out
+        # what an earlier writer already stored (#263). Both halves of the row
+        # are affected, so both are COALESCEd:
+        #   - the metadata columns, when an ingest path could not read the
+        #     attributes off the Telethon object;
+        #   - the file-identity columns, because ``_process_media`` returns a
+        #     value-less row for an over-size skip and for a download error —
+        #     that row used to null the file_path/file_name/content_hash/
+        #     download_date of a file that is still on disk.
+        # COALESCE only falls back on NULL, so a real value still overwrites a
+        # real value: a re-download to a new path DOES update file_path.
+        # (``mark_media_for_redownload`` is a separate UPDATE that clears these
+        # deliberately; it currently has no production caller, only tests.)
+        update_values = dict(values)
+        for column in (
+            "file_name",
+            "file_path",
+            "file_size",
+            "mime_type",
+            "width",
+            "height",
+            "duration",
+            "content_hash",
+            "download_date",
+        ):
+            update_values[column] = func.coalesce(getattr(stmt.excluded, column), getattr(Media, column))
+        # ``downloaded`` is a flag, not a value: 0 is a real value, so COALESCE
+        # cannot express "this writer has no opinion" for it. The KEY'S PRESENCE
+        # in ``media_data`` does instead:
+        #   - present -> the writer observed the outcome, so write it. A failed
+        #     download therefore sets 0 again and the row returns to
+        #     ``get_pending_media_downloads``, which ``_retry_pending_media_downloads``
+        #     drains on EVERY backup cycle. That is the only always-on recovery
+        #     path: ``TelegramBackup._verify_and_redownload_media`` (the disk-stat
+        #     scan) runs only when VERIFY_MEDIA is on, and it defaults to false.
+        #     Pinning the flag at 1 stranded such a row forever, pointing at a
+        #     file that is gone.
+        #   - absent -> the writer knows nothing about what is on disk, so keep
+        #     the stored flag. ``_process_media``'s over-size skip is the one
+        #     such writer: the file may already be on disk from a run with a
+        #     higher MAX_MEDIA_SIZE, and flipping it to 0 would hide it from the
+        #     gallery (``get_media_paginated`` filters ``downloaded == 1``)
+        #     without ever retrying it (``get_pending_media_downloads`` excludes
+        #     its over-limit file_size).
+        # A fresh INSERT still lands 0 for an absent key — nothing is downloaded.
+        if "downloaded" not in media_data:
+            update_values["downloaded"] = Media.downloaded
+        return stmt.on_conflict_do_update(index_elements=["id"], set_=update_values)
+
     @retry_on_locked()
     async def insert_media(self, media_data: dict[str, Any]) -> None:
         """Insert (or upsert) a media file record.
@@ -1128,78 +1283,25 @@ class DatabaseAdapter:
         False after a skip/failure it is willing to have retried), and OMIT it
         when the caller cannot know whether a file is on disk. An omitted key
         means "leave the stored flag alone" on conflict and 0 on a fresh insert —
-        see the comment on the conflict clause below.
+        see the comment on the conflict clause in _insert_media_stmt().
         """
         async with self.db_manager.async_session_factory() as session:
-            values = {
-                "id": media_data["id"],
-                "message_id": media_data.get("message_id"),
-                "chat_id": media_data.get("chat_id"),
-                "type": media_data["type"],
-                "file_name": media_data.get("file_name"),
-                "file_path": media_data.get("file_path"),
-                "file_size": media_data.get("file_size"),
-                "mime_type": media_data.get("mime_type"),
-                "width": media_data.get("width"),
-                "height": media_data.get("height"),
-                "duration": media_data.get("duration"),
-                "content_hash": media_data.get("content_hash"),
-                "downloaded": 1 if media_data.get("downloaded") else 0,
-                "download_date": media_data.get("download_date"),
-            }
+            await session.execute(self._insert_media_stmt(media_data))
+            await session.commit()
 
-            stmt = sqlite_insert(Media).values(**values) if self._is_sqlite else pg_insert(Media).values(**values)
-
-            # On conflict, a writer that has NO value for a column must not blank out
-            # what an earlier writer already stored (#263). Both halves of the row
-            # are affected, so both are COALESCEd:
-            #   - the metadata columns, when an ingest path could not read the
-            #     attributes off the Telethon object;
-            #   - the file-identity columns, because ``_process_media`` returns a
-            #     value-less row for an over-size skip and for a download error —
-            #     that row used to null the file_path/file_name/content_hash/
-            #     download_date of a file that is still on disk.
-            # COALESCE only falls back on NULL, so a real value still overwrites a
-            # real value: a re-download to a new path DOES update file_path.
-            # (``mark_media_for_redownload`` is a separate UPDATE that clears these
-            # deliberately; it currently has no production caller, only tests.)
-            update_values = dict(values)
-            for column in (
-                "file_name",
-                "file_path",
-                "file_size",
-                "mime_type",
-                "width",
-                "height",
-                "duration",
-                "content_hash",
-                "download_date",
-            ):
-                update_values[column] = func.coalesce(getattr(stmt.excluded, column), getattr(Media, column))
-            # ``downloaded`` is a flag, not a value: 0 is a real value, so COALESCE
-            # cannot express "this writer has no opinion" for it. The KEY'S PRESENCE
-            # in ``media_data`` does instead:
-            #   - present -> the writer observed the outcome, so write it. A failed
-            #     download therefore sets 0 again and the row returns to
-            #     ``get_pending_media_downloads``, which ``_retry_pending_media_downloads``
-            #     drains on EVERY backup cycle. That is the only always-on recovery
-            #     path: ``TelegramBackup._verify_and_redownload_media`` (the disk-stat
-            #     scan) runs only when VERIFY_MEDIA is on, and it defaults to false.
-            #     Pinning the flag at 1 stranded such a row forever, pointing at a
-            #     file that is gone.
-            #   - absent -> the writer knows nothing about what is on disk, so keep
-            #     the stored flag. ``_process_media``'s over-size skip is the one
-            #     such writer: the file may already be on disk from a run with a
-            #     higher MAX_MEDIA_SIZE, and flipping it to 0 would hide it from the
-            #     gallery (``get_media_paginated`` filters ``downloaded == 1``)
-            #     without ever retrying it (``get_pending_media_downloads`` excludes
-            #     its over-limit file_size).
-            # A fresh INSERT still lands 0 for an absent key — nothing is downloaded.
-            if "downloaded" not in media_data:
-                update_values["downloaded"] = Media.downloaded
-            stmt = stmt.on_conflict_do_update(index_elements=["id"], set_=update_values)
+    @retry_on_locked()
+    async def insert_media_batch(self, media_list: list[dict[str, Any]]) -> None:
+        """Insert (or upsert) multiple media records in a single transaction.
+
+        Each record follows the same conflict rules as insert_media().
+        """
+        if not media_list:
+            return
+
+        async with self.db_manager.async_session_factory() as session:
+            for media_data in media_list:
+                await session.execute(self._insert_media_stmt(media_data))
 
-            await session.execute(stmt)
             await session.commit()
 
     async def find_media_by_content_hash(self, content_hash: str) -> dict[str, Any] | None:
@@ -1227,22 +1329,17 @@ class DatabaseAdapter:
             List of media records with file paths and metadata
         """
         async with self.db_manager.async_session_factory() as session:
-            stmt = select(Media).where(Media.chat_id == chat_id)
+            stmt = select(
+                Media.id,
+                Media.message_id,
+                Media.chat_id,
+                Media.type,
+                Media.file_path,
+                Media.file_size,
+                Media.downloaded,
+            ).where(Media.chat_id == chat_id)
             result = await session.execute(stmt)
-            media_records = result.scalars().all()
-
-            return [
-                {
-                    "id": m.id,
-                    "message_id": m.message_id,
-                    "chat_id": m.chat_id,
-                    "type": m.type,
-                    "file_path": m.file_path,
-                    "file_size": m.file_size,
-                    "downloaded": m.downloaded,
-                }
-                for m in media_records
-            ]
+            return [dict(row) for row in result.mappings()]
 
     async def get_media_paginated(
         self,
@@ -2127,27 +2224,8 @@ class DatabaseAdapter:
             (both nullable) so the viewer can render "Reply to <name>" (#268).
         """
         async with self.db_manager.async_session_factory() as session:
-            # Build query with joins - v6.0.0: join on composite key
-            stmt = (
-                select(
-                    Message,
-                    User.first_name,
-                    User.last_name,
-                    User.username,
-                    Media.id.label("media_id"),
-                    Media.type.label("media_type"),
-                    Media.file_path.label("media_file_path"),
-                    Media.file_name.label("media_file_name"),
-                    Media.file_size.label("media_file_size"),
-                    Media.mime_type.label("media_mime_type"),
-                    Media.width.label("media_width"),
-                    Media.height.label("media_height"),
-                    Media.duration.label("media_duration"),
-                )
-                .outerjoin(User, Message.sender_id == User.id)
-                .outerjoin(Media, and_(Media.message_id == Message.id, Media.chat_id == Message.chat_id))
-                .where(Message.chat_id == chat_id)
-            )
+            # Joined query - v6.0.0: media joins on the composite key
+            stmt = _VIEWER_MESSAGE_SELECT.where(Message.chat_id == chat_id)
 
             # v6.2.0: Filter by forum topic. NULL reply_to_top_id == General (id=1),
             # matching the coalesce in get_forum_topics counts.
@@ -2197,7 +2275,7 @@ class DatabaseAdapter:
             messages = []
 
             for row in result:
-                msg = self._message_to_dict(row.Message)
+                msg = self._message_to_dict(row)
                 msg["first_name"] = row.first_name
                 msg["last_name"] = row.last_name
                 msg["username"] = row.username
@@ -2338,26 +2416,7 @@ class DatabaseAdapter:
             Message dictionary with user and media info, or None
         """
         async with self.db_manager.async_session_factory() as session:
-            base_stmt = (
-                select(
-                    Message,
-                    User.first_name,
-                    User.last_name,
-                    User.username,
-                    Media.id.label("media_id"),
-                    Media.type.label("media_type"),
-                    Media.file_path.label("media_file_path"),
-                    Media.file_name.label("media_file_name"),
-                    Media.file_size.label("media_file_size"),
-                    Media.mime_type.label("media_mime_type"),
-                    Media.width.label("media_width"),
-                    Media.height.label("media_height"),
-                    Media.duration.label("media_duration"),
-                )
-                .outerjoin(User, Message.sender_id == User.id)
-                .outerjoin(Media, and_(Media.message_id == Message.id, Media.chat_id == Message.chat_id))
-                .where(Message.chat_id == chat_id)
-            )
+            base_stmt = _VIEWER_MESSAGE_SELECT.where(Message.chat_id == chat_id)
             if topic_id is not None:
                 base_stmt = base_stmt.where(func.coalesce(Message.reply_to_top_id, 1) == topic_id)
 
@@ -2381,7 +2440,7 @@ class DatabaseAdapter:
             if not row:
                 return None
 
-            msg = self._message_to_dict(row.Message)
+            msg = self._message_to_dict(row)
             msg["first_name"] = row.first_name
             msg["last_name"] = row.last_name
             msg["username"] = row.username
@@ -2432,23 +2491,23 @@ class DatabaseAdapter:
     async def get_chat_by_id(self, chat_id: int) -> dict[str, Any] | None:
         """Get a single chat by ID."""
         async with self.db_manager.async_session_factory() as session:
-            result = await session.execute(select(Chat).where(Chat.id == chat_id))
-            chat = result.scalar_one_or_none()
-            if not chat:
-                return None
-            return {
-                "id": chat.id,
-                "type": chat.type,
-                "title": chat.title,
-                "username": chat.username,
-                "first_name": chat.first_name,
-                "last_name": chat.last_name,
-                "phone": chat.phone,
-                "description": chat.description,
-                "participants_count": chat.participants_count,
-                "is_forum": chat.is_forum,
-                "is_archived": chat.is_archived,
-            }
+            result = await session.execute(
+                select(
+                    Chat.id,
+                    Chat.type,
+                    Chat.title,
+                    Chat.username,
+                    Chat.first_name,
+                    Chat.last_name,
+                    Chat.phone,
+                    Chat.description,
+                    Chat.participants_count,
+                    Chat.is_forum,
+                    Chat.is_archived,
+                ).where(Chat.id == chat_id)
+            )
+            row = result.mappings().one_or_none()
+            return dict(row) if row else None
 
     async def get_pinned_messages(self, chat_id: int) -> list[dict[str, Any]]:
         """Get all pinned messages for a chat, ordered by date descending (newest first).
@@ -2462,24 +2521,7 @@ class DatabaseAdapter:
         """
         async with self.db_manager.async_session_factory() as session:
             stmt = (
-                select(
-                    Message,
-                    User.first_name,
-                    User.last_name,
-                    User.username,
-                    Media.id.label("media_id"),
-                    Media.type.label("media_type"),
-                    Media.file_path.label("media_file_path"),
-                    Media.file_name.label("media_file_name"),
-                    Media.file_size.label("media_file_size"),
-                    Media.mime_type.label("media_mime_type"),
-                    Media.width.label("media_width"),
-                    Media.height.label("media_height"),
-                    Media.duration.label("media_duration"),
-                )
-                .outerjoin(User, Message.sender_id == User.id)
-                .outerjoin(Media, and_(Media.message_id == Message.id, Media.chat_id == Message.chat_id))
-                .where(Message.chat_id == chat_id)
+                _VIEWER_MESSAGE_SELECT.where(Message.chat_id == chat_id)
                 .where(Message.is_pinned == 1)
                 .order_by(Message.date.desc())
             )
@@ -2489,7 +2531,7 @@ class DatabaseAdapter:
 
             messages = []
             for row in rows:
-                msg = self._message_to_dict(row.Message)
+                msg = self._message_to_dict(row)
                 msg["first_name"] = row.first_name
                 msg["last_name"] = row.last_name
                 msg["username"] = row.username
@@ -2537,20 +2579,15 @@ class DatabaseAdapter:
             pinned_message_ids: List of message IDs that are currently pinned
         """
         async with self.db_manager.async_session_factory() as session:
-            # First, unpin all messages in this chat
+            # Single statement: only rows that are pinned now or should be pinned
+            # are touched, so the rest of the chat is never rewritten.
+            is_listed = Message.id.in_(pinned_message_ids)
             await session.execute(
-                update(Message).where(Message.chat_id == chat_id).where(Message.is_pinned == 1).values(is_pinned=0)
+                update(Message)
+                .where(Message.chat_id == chat_id)
+                .where(or_(Message.is_pinned == 1, is_listed))
+                .values(is_pinned=case((is_listed, 1), else_=0))
             )
-
-            # Then, pin the specified messages (if any exist in our database)
-            if pinned_message_ids:
-                await session.execute(
-                    update(Message)
-                    .where(Message.chat_id == chat_id)
-                    .where(Message.id.in_(pinned_message_ids))
-                    .values(is_pinned=1)
-                )
-
             await session.commit()
 
     async def update_message_pinned(self, chat_id: int, message_id: int, is_pinned: bool) -> None:
@@ -2576,18 +2613,13 @@ class DatabaseAdapter:
     async def get_user_by_id(self, user_id: int) -> dict[str, Any] | None:
         """Get a user by ID."""
         async with self.db_manager.async_session_factory() as session:
-            result = await session.execute(select(User).where(User.id == user_id))
-            user = result.scalar_one_or_none()
-            if not user:
-                return None
-            return {
-                "id": user.id,
-                "username": user.username,
-                "first_name": user.first_name,
-                "last_name": user.last_name,
-                "phone": user.phone,
-                "is_bot": user.is_bot,
-            }
+            result = await session.execute(
+                select(User.id, User.username, User.first_name, User.last_name, User.phone, User.is_bot).where(
+                    User.id == user_id
+                )
+            )
+            row = result.mappings().one_or_none()
+            return dict(row) if row else None
 
     async def get_messages_for_export(self, chat_id: int, include_media: bool = False):
         """
@@ -2642,7 +2674,7 @@ class DatabaseAdapter:
                     .order_by(Message.date.asc())
                 )
 
-            result = await session.stream(stmt)
+            result = await session.stream(stmt.execution_options(yield_per=_EXPORT_YIELD_PER))
             async for row in result:
                 msg = {
                     "id": row.id,
@@ -2692,7 +2724,7 @@ class DatabaseAdapter:
                 "is_pinned": values["is_pinned"],
                 "is_hidden": values["is_hidden"],
                 "date": values["date"],
-                "updated_at": utcnow_naive(),
+                "updated_at": values["updated_at"],
             }
 
             if self._is_sqlite:
@@ -2771,7 +2803,7 @@ class DatabaseAdapter:
                 "title": values["title"],
                 "emoticon": values["emoticon"],
                 "sort_order": values["sort_order"],
-                "updated_at": utcnow_naive(),
+                "updated_at": values["updated_at"],
             }
 
             if self._is_sqlite:
@@ -2806,9 +2838,10 @@ class DatabaseAdapter:
                     result = await session.execute(select(Chat.id).where(Chat.id.in_(chunk)))
                     existing_ids.update(row[0] for row in result)
 
-                for cid in unique_ids:
-                    if cid in existing_ids:
-                        session.add(ChatFolderMember(folder_id=folder_id, chat_id=cid))
+                # One Core executemany INSERT; no ORM instance per member
+                member_rows = [{"folder_id": folder_id, "chat_id": cid} for cid in unique_ids if cid in existing_ids]
+                if member_rows:
+                    await session.execute(insert(ChatFolderMember), member_rows)
 
             await session.commit()
 
@@ -3247,17 +3280,18 @@ class DatabaseAdapter:
     async def set_setting(self, key: str, value: str) -> None:
         """Set a key-value setting (upsert)."""
         async with self.db_manager.async_session_factory() as session:
+            now = utcnow_naive()
             if self._is_sqlite:
-                stmt = sqlite_insert(AppSettings).values(key=key, value=value, updated_at=utcnow_naive())
+                stmt = sqlite_insert(AppSettings).values(key=key, value=value, updated_at=now)
                 stmt = stmt.on_conflict_do_update(
                     index_elements=["key"],
-                    set_={"value": value, "updated_at": utcnow_naive()},
+                    set_={"value": value, "updated_at": now},
                 )
             else:
-                stmt = pg_insert(AppSettings).values(key=key, value=value, updated_at=utcnow_naive())
+                stmt = pg_insert(AppSettings).values(key=key, value=value, updated_at=now)
                 stmt = stmt.on_conflict_do_update(
                     index_elements=["key"],
-                    set_={"value": value, "updated_at": utcnow_naive()},
+                    set_={"value": value, "updated_at": now},
                 )
             await session.execute(stmt)
             await session.commit()
@@ -3265,9 +3299,8 @@ class DatabaseAdapter:
     async def get_setting(self, key: str) -> str | None:
         """Get a setting value by key. Returns None if not found."""
         async with self.db_manager.async_session_factory() as session:
-            result = await session.execute(select(AppSettings).where(AppSettings.key == key))
-            row = result.scalar_one_or_none()
-            return row.value if row else None
+            result = await session.execute(select(AppSettings.value).where(AppSettings.key == key))
+            return result.scalar_one_or_none()
 
     async def get_all_settings(self) -> dict[str, str]:
         """Get all settings as a dict."""
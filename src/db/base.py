@@ -12,7 +12,7 @@ from urllib.parse import quote_plus
 
 from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from .models import Base
 
@@ -109,13 +109,17 @@ class DatabaseManager:
 
         # Engine configuration differs by database type
         if self._is_sqlite:
-            # SQLite: Use NullPool for better async compatibility
+            # SQLite: pool connections like PostgreSQL does. With NullPool every
+            # session opened the file, started an aiosqlite worker thread and
+            # re-ran the PRAGMAs below; pooled connections keep all of that.
             # hide_parameters: DB errors must never embed bound values (message
             # text, chat ids) in logs — PII rule.
             self.engine = create_async_engine(
                 self.database_url,
                 echo=os.getenv("DB_ECHO", "false").lower() == "true",
-                poolclass=NullPool,
+                poolclass=AsyncAdaptedQueuePool,
+                pool_size=5,
+                max_overflow=10,
                 hide_parameters=True,
             )
             # Set up SQLite-specific pragmas
@@ -124,6 +128,9 @@ class DatabaseManager:
             # PostgreSQL: Use connection pooling
             # hide_parameters: DB errors must never embed bound values (message
             # text, chat ids) in logs — PII rule.
+            # Pre-ping costs a SELECT 1 round-trip on every checkout; behind a
+            # transaction-mode PgBouncer it can be turned off in favour of a
+            # short DB_POOL_RECYCLE (seconds, -1 = never recycle).
             self.engine = create_async_engine(
                 self.database_url,
                 echo=os.getenv("DB_ECHO", "false").lower() == "true",
@@ -131,7 +138,8 @@ class DatabaseManager:
                 poolclass=AsyncAdaptedQueuePool,
                 pool_size=5,
                 max_overflow=10,
-                pool_pre_ping=True,
+                pool_pre_ping=os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+                pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "-1")),
             )
 
         # Create async session factory
@@ -182,6 +190,9 @@ class DatabaseManager:
                 cursor.execute("PRAGMA busy_timeout=60000")
                 # 64MB cache for better performance
                 cursor.execute("PRAGMA cache_size=-64000")
+                # Memory-map up to 256MB of the file so reads skip the extra copy
+                # through SQLite's page cache
+                cursor.execute("PRAGMA mmap_size=268435456")
             except Exception:
                 pass  # Read-only PRAGMAs are non-critical
             cursor.close()
@@ -255,6 +266,16 @@ class DatabaseManager:
     async def close(self) -> None:
         """Close database connections."""
         if self.engine:
+            if self._is_sqlite:
+                # Refresh query-planner statistics where SQLite thinks they are stale.
+                # 0x10002 checks every table (not just ones this connection used);
+                # analysis_limit keeps each ANALYZE to a bounded sample.
+                try:
+                    async with self.engine.connect() as conn:
+                        await conn.execute(text("PRAGMA analysis_limit=400"))
+                        await conn.execute(text("PRAGMA optimize=0x10002"))
+                except Exception:
+                    logger.debug("Skipped PRAGMA optimize (database may be read-only)")
             await self.engine.dispose()
             logger.info("Database connections closed")
 
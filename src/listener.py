@@ -13,9 +13,11 @@ Telegram deletions never remove archived messages.
 """
 
 import asyncio
+import heapq
 import json
 import logging
 import os
+import time
 from collections import deque
 from datetime import datetime, timedelta
 from typing import Any
@@ -95,13 +97,20 @@ class MassOperationProtector:
         """
         self.threshold = threshold
         self.window_seconds = window_seconds
-        self.window = timedelta(seconds=window_seconds)
 
-        # Operation history for sliding window: {chat_id: deque of timestamps}
-        self._operation_history: dict[int, deque[datetime]] = {}
+        # Operation history for sliding window: {chat_id: deque of monotonic timestamps}.
+        # Each deque is a ring capped at threshold + 1 entries: one past the
+        # threshold is all check_operation needs to see to trigger a block.
+        self._operation_history: dict[int, deque[float]] = {}
 
-        # Blocked chats: {chat_id: (blocked_until, reason, blocked_count)}
-        self._blocked: dict[int, tuple[datetime, str, int]] = {}
+        # Blocked chats: {chat_id: (blocked_until, reason, blocked_count)}, with
+        # blocked_until on the time.monotonic() clock so wall-clock jumps can't
+        # shorten or extend a block.
+        self._blocked: dict[int, tuple[float, str, int]] = {}
+        # Min-heap of (blocked_until, chat_id) so expired blocks are reaped in
+        # expiry order instead of scanning every blocked chat. Entries whose
+        # block was already lifted or replaced are skipped when popped.
+        self._block_expiry_heap: list[tuple[float, int]] = []
 
         self._running = False
 
@@ -126,7 +135,7 @@ class MassOperationProtector:
         """Check if a chat is currently rate-limited."""
         if chat_id in self._blocked:
             blocked_until, reason, _ = self._blocked[chat_id]
-            if datetime.now() < blocked_until:
+            if time.monotonic() < blocked_until:
                 return True, reason
             else:
                 # Block expired
@@ -134,13 +143,21 @@ class MassOperationProtector:
                 logger.info("🔓 Rate limit expired for chat")
         return False, ""
 
+    def _reap_blocked(self, now: float) -> None:
+        """Drop blocks that expired by ``now``, oldest first."""
+        heap = self._block_expiry_heap
+        while heap and heap[0][0] <= now:
+            blocked_until, chat_id = heapq.heappop(heap)
+            entry = self._blocked.get(chat_id)
+            if entry is not None and entry[0] == blocked_until:
+                del self._blocked[chat_id]
+
     def _count_ops_in_window(self, chat_id: int) -> int:
         """Count operations in the sliding time window for a chat."""
         if chat_id not in self._operation_history:
             return 0
 
-        now = datetime.now()
-        cutoff = now - self.window
+        cutoff = time.monotonic() - self.window_seconds
 
         # Clean old entries and count
         history = self._operation_history[chat_id]
@@ -151,9 +168,10 @@ class MassOperationProtector:
 
     def _record_operation(self, chat_id: int):
         """Record an operation timestamp for sliding window tracking."""
-        if chat_id not in self._operation_history:
-            self._operation_history[chat_id] = deque()
-        self._operation_history[chat_id].append(datetime.now())
+        history = self._operation_history.get(chat_id)
+        if history is None:
+            history = self._operation_history[chat_id] = deque(maxlen=self.threshold + 1)
+        history.append(time.monotonic())
 
     def check_operation(self, chat_id: int, operation_type: str) -> tuple[bool, str]:
         """
@@ -177,9 +195,12 @@ class MassOperationProtector:
 
         if ops_in_window > self.threshold:
             # Rate limit triggered - block further operations
-            block_until = datetime.now() + self.window
+            now = time.monotonic()
+            self._reap_blocked(now)
+            block_until = now + self.window_seconds
             reason = f"Rate limit: {ops_in_window} {operation_type}s in {self.window_seconds}s (max: {self.threshold})"
             self._blocked[chat_id] = (block_until, reason, ops_in_window - self.threshold)
+            heapq.heappush(self._block_expiry_heap, (block_until, chat_id))
 
             # Update stats
             self.stats["rate_limits_triggered"] += 1
@@ -191,7 +212,7 @@ class MassOperationProtector:
             logger.warning(f"   Operation type: {operation_type}")
             logger.warning(f"   Operations in {self.window_seconds}s: {ops_in_window} (max: {self.threshold})")
             logger.warning(f"   First {self.threshold} were applied, remaining blocked")
-            logger.warning(f"   Chat blocked until: {block_until}")
+            logger.warning(f"   Chat blocked until: {datetime.now() + timedelta(seconds=self.window_seconds)}")
             logger.warning("=" * 70)
 
             return False, reason
@@ -202,17 +223,19 @@ class MassOperationProtector:
 
     def get_stats(self) -> dict[str, Any]:
         """Get rate limiter statistics."""
+        self._reap_blocked(time.monotonic())
         return {
             "operations_applied": self.stats["operations_applied"],
             "operations_blocked": self.stats["operations_blocked"],
             "rate_limits_triggered": self.stats["rate_limits_triggered"],
             "chats_rate_limited": len(self.stats["chats_rate_limited"]),
-            "currently_blocked": len([c for c in self._blocked if datetime.now() < self._blocked[c][0]]),
+            "currently_blocked": len(self._blocked),
         }
 
     def get_blocked_chats(self) -> dict[int, tuple[str, int]]:
         """Get currently rate-limited chats."""
-        now = datetime.now()
+        now = time.monotonic()
+        self._reap_blocked(now)
         return {
             chat_id: (reason, blocked_count)
             for chat_id, (blocked_until, reason, blocked_count) in self._blocked.items()
@@ -263,6 +286,14 @@ class TelegramListener:
         # dedicated set (not just folded into _tracked_chat_ids) so whitelist
         # mode — which ignores _tracked_chat_ids — can still process them.
         self._followed_live: set[int] = set()
+        # Union of the explicit include lists, built once: config is fixed for
+        # the listener's lifetime and _should_process_chat runs on every event.
+        self._all_include_ids: frozenset[int] = frozenset().union(
+            config.global_include_ids,
+            config.private_include_ids,
+            config.groups_include_ids,
+            config.channels_include_ids,
+        )
 
         # Zero-footprint mass operation protection
         self._protector = MassOperationProtector(
@@ -281,6 +312,9 @@ class TelegramListener:
         # rate-limit edits/deletions in the same chat.
         self._reaction_pending: dict[tuple[int, int], list[dict]] = {}
         self._reaction_flush_task: asyncio.Task | None = None
+        # Set by every producer that buffers a snapshot, so the flusher sleeps
+        # on it while the buffer is empty instead of waking each window.
+        self._reaction_wakeup = asyncio.Event()
 
         # Real-time notifier for viewer WebSocket updates
         self._notifier: RealtimeNotifier | None = None
@@ -297,6 +331,8 @@ class TelegramListener:
             "new_messages_saved": 0,
             "reactions_received": 0,
             "reactions_applied": 0,
+            "chat_actions": 0,
+            "pins": 0,
             "bursts_intercepted": 0,
             "operations_discarded": 0,
             "errors": 0,
@@ -451,7 +487,12 @@ class TelegramListener:
     def _get_marked_id(self, entity_or_peer) -> int:
         """
         Get the marked ID for an entity (with -100 prefix for channels/supergroups).
+
+        Telethon's ``event.chat_id`` is already a marked int, so that case skips
+        get_peer_id's type dispatch (an exact type check keeps bools out).
         """
+        if type(entity_or_peer) is int:
+            return entity_or_peer
         try:
             return get_peer_id(entity_or_peer)
         except Exception:
@@ -491,7 +532,7 @@ class TelegramListener:
             chat_id = data.get("chat_id", 0)
             await self._notifier.notify(nt, chat_id, data)
         except Exception as e:
-            logger.debug(f"Failed to send notification: {e}")
+            logger.debug("Failed to send notification: %s", e)
 
     def _buffer_reaction_snapshot(self, chat_id: int, message: object, *, overwrite: bool = True) -> None:
         """Feed a message's reaction snapshot into the debounce buffer (#221).
@@ -521,6 +562,7 @@ class TelegramListener:
             self._reaction_pending[key] = observed
         else:
             self._reaction_pending.setdefault(key, observed)
+        self._reaction_wakeup.set()
         self.stats["reactions_received"] += 1
 
     async def _flush_reactions(self) -> None:
@@ -548,10 +590,18 @@ class TelegramListener:
                 logger.error(f"Error reconciling reactions: {type(e).__name__}")
 
     async def _reaction_flush_loop(self) -> None:
-        """Periodically flush the reaction debounce buffer while the listener runs."""
+        """Flush the reaction debounce buffer while the listener runs.
+
+        Idles on ``_reaction_wakeup`` until a snapshot is buffered, then waits
+        one debounce window so the burst coalesces before flushing. The event
+        is cleared right before the (synchronous) buffer swap, so a snapshot
+        buffered during the flush's awaits re-arms it and is not missed.
+        """
         try:
             while self._running:
+                await self._reaction_wakeup.wait()
                 await asyncio.sleep(self.config.reaction_debounce_seconds)
+                self._reaction_wakeup.clear()
                 await self._flush_reactions()
         except asyncio.CancelledError:
             raise
@@ -563,29 +613,35 @@ class TelegramListener:
 
     async def _apply_message_deletion(self, chat_id: int, message_id: int) -> None:
         """Apply a Telegram deletion event according to DELETION_MODE."""
+        await self._apply_message_deletions(chat_id, [message_id])
+
+    async def _apply_message_deletions(self, chat_id: int, message_ids: list[int]) -> None:
+        """Apply one chat's deletions with a single DB call, then notify per message."""
         deletion_mode = self._get_deletion_mode()
 
         if deletion_mode == "soft":
             deleted_at = utcnow_naive()
-            await self.db.mark_message_deleted(chat_id, message_id, deleted_at=deleted_at)
+            await self.db.mark_messages_deleted(chat_id, message_ids, deleted_at=deleted_at)
             logger.debug("🗑️ Deletion marked")
-            await self._notify_update(
-                "delete",
-                {
-                    "chat_id": chat_id,
-                    "message_id": message_id,
-                    "deletion_mode": "soft",
-                    "deleted_at": deleted_at.isoformat(),
-                },
-            )
+            for message_id in message_ids:
+                await self._notify_update(
+                    "delete",
+                    {
+                        "chat_id": chat_id,
+                        "message_id": message_id,
+                        "deletion_mode": "soft",
+                        "deleted_at": deleted_at.isoformat(),
+                    },
+                )
             return
 
-        await self.db.delete_message(chat_id, message_id)
+        await self.db.delete_messages(chat_id, message_ids)
         logger.debug("🗑️ Deletion applied")
-        await self._notify_update(
-            "delete",
-            {"chat_id": chat_id, "message_id": message_id, "deletion_mode": "hard"},
-        )
+        for message_id in message_ids:
+            await self._notify_update(
+                "delete",
+                {"chat_id": chat_id, "message_id": message_id, "deletion_mode": "hard"},
+            )
 
     def _should_process_chat(self, chat_id: int) -> bool:
         """
@@ -608,24 +664,11 @@ class TelegramListener:
         if self.config.whitelist_mode:
             return chat_id in self.config.chat_ids or chat_id in self._followed_live
 
-        # MODE 2: Type-based Mode
-        # First, check if it's in our tracked chats
-        if chat_id in self._tracked_chat_ids:
-            return True
-
-        # If not tracked yet, check if it would be backed up based on config
-        # We can't determine chat type without fetching the entity, so be conservative
-        # and only process if it's in an explicit include list
-        if chat_id in self.config.global_include_ids:
-            return True
-        if chat_id in self.config.private_include_ids:
-            return True
-        if chat_id in self.config.groups_include_ids:
-            return True
-        if chat_id in self.config.channels_include_ids:
-            return True
-
-        return False
+        # MODE 2: Type-based Mode - tracked chats (backed up at least once), or
+        # chats not tracked yet that would be backed up based on config. We can't
+        # determine chat type without fetching the entity, so be conservative and
+        # only accept those in an explicit include list.
+        return chat_id in self._tracked_chat_ids or chat_id in self._all_include_ids
 
     def _get_chat_type(self, entity) -> str:
         """Determine chat type from Telethon entity."""
@@ -764,7 +807,7 @@ class TelegramListener:
 
             max_size = self.config.get_max_media_size_bytes()
             if file_size > max_size:
-                logger.debug(f"Skipping large media file: {file_size / 1024 / 1024:.2f} MB")
+                logger.debug("Skipping large media file: %.2f MB", file_size / 1024 / 1024)
                 return None
 
             # Create chat-specific media directory
@@ -923,7 +966,7 @@ class TelegramListener:
             if not self.config.listen_deletions:
                 if event.deleted_ids:
                     self.stats["deletions_skipped"] += len(event.deleted_ids)
-                    logger.debug(f"⏭️ Deletion skipped (LISTEN_DELETIONS=false): {len(event.deleted_ids)} messages")
+                    logger.debug("⏭️ Deletion skipped (LISTEN_DELETIONS=false): %d messages", len(event.deleted_ids))
                 return
 
             try:
@@ -935,7 +978,9 @@ class TelegramListener:
                     if not self._should_process_chat(chat_id):
                         return
 
-                # Process each deletion
+                # Process each deletion. With a known chat_id the rate-limited
+                # survivors are collected and written in one batch below.
+                allowed_ids: list[int] = []
                 for msg_id in event.deleted_ids:
                     self.stats["deletions_received"] += 1
 
@@ -975,9 +1020,12 @@ class TelegramListener:
                         self.stats["operations_discarded"] += 1
                         continue
 
-                    # Apply the deletion immediately
-                    await self._apply_message_deletion(effective_chat_id, msg_id)
-                    self.stats["deletions_applied"] += 1
+                    allowed_ids.append(msg_id)
+
+                # Apply the known chat's allowed deletions in one batch
+                if allowed_ids:
+                    await self._apply_message_deletions(chat_id, allowed_ids)
+                    self.stats["deletions_applied"] += len(allowed_ids)
 
             except Exception as e:
                 self.stats["errors"] += 1
@@ -994,16 +1042,17 @@ class TelegramListener:
             try:
                 chat_id = self._get_marked_id(event.chat_id)
 
-                # Add to tracked chats if we should be backing up this chat
-                if chat_id not in self._tracked_chat_ids:
-                    if self._should_process_chat(chat_id):
+                # Already-tracked chats pass on a single set probe in type-based
+                # mode. Untracked chats (and whitelist mode, which ignores the
+                # tracked set) go through the full check, and are added to
+                # tracking if we should be backing them up.
+                if self.config.whitelist_mode or chat_id not in self._tracked_chat_ids:
+                    if not self._should_process_chat(chat_id):
+                        return
+                    if chat_id not in self._tracked_chat_ids:
                         self._tracked_chat_ids.add(chat_id)
                         logger.debug("Added chat to tracking list")
 
-                # Skip if not in tracked chats
-                if not self._should_process_chat(chat_id):
-                    return
-
                 # Save the message to database
                 message = event.message
 
@@ -1193,8 +1242,6 @@ class TelegramListener:
                     return
 
                 # Track stats
-                if "chat_actions" not in self.stats:
-                    self.stats["chat_actions"] = 0
                 self.stats["chat_actions"] += 1
 
                 # Only events built from a real service message carry a row we can
@@ -1366,8 +1413,6 @@ class TelegramListener:
                     return
 
                 # Track stats
-                if "pins" not in self.stats:
-                    self.stats["pins"] = 0
                 self.stats["pins"] += len(pinned_messages)
 
                 # Update each message's pinned status
@@ -1414,6 +1459,7 @@ class TelegramListener:
                 self.stats["reactions_received"] += 1
                 # Latest full snapshot wins; the timed flush reconciles + broadcasts.
                 self._reaction_pending[(chat_id, event.msg_id)] = observed
+                self._reaction_wakeup.set()
             except Exception as e:
                 self.stats["errors"] += 1
                 logger.error(f"Error in reaction handler: {type(e).__name__}")
@@ -1480,7 +1526,7 @@ class TelegramListener:
             try:
                 await self._flush_reactions()
             except Exception as e:
-                logger.debug(f"Final reaction flush failed: {type(e).__name__}")
+                logger.debug("Final reaction flush failed: %s", type(e).__name__)
 
             # Stop the protector
             await self._protector.stop()
@@ -1508,7 +1554,7 @@ class TelegramListener:
                 # Small delay to allow internal task cleanup
                 await asyncio.sleep(0.5)
             except Exception as e:
-                logger.debug(f"Listener disconnect cleanup: {e}")
+                logger.debug("Listener disconnect cleanup: %s", e)
 
         await self._log_stats()
         logger.info("Listener stopped")
@@ -1766,12 +1766,16 @@ class TelegramBackup:
         return grand_total
 
     async def _commit_batch(self, batch_data: list[dict], chat_id: int) -> None:
-        """Persist a batch of processed messages, their media and reactions to the DB."""
+        """Persist a batch of processed messages, their senders, media and reactions to the DB."""
+        senders = [msg["_sender_data"] for msg in batch_data if msg.get("_sender_data")]
+        if senders:
+            await self.db.upsert_users_batch(senders)
+
         await self.db.insert_messages_batch(batch_data)
 
-        for msg in batch_data:
-            if msg.get("_media_data"):
-                await self.db.insert_media(msg["_media_data"])
+        media_batch = [msg["_media_data"] for msg in batch_data if msg.get("_media_data")]
+        if media_batch:
+            await self.db.insert_media_batch(media_batch)
 
         for msg in batch_data:
             # Reconcile reactions for every processed message, including those whose
@@ -2414,11 +2418,8 @@ class TelegramBackup:
         # message and create avoidable flood risk on large histories.
         sender = message.sender
 
-        # Save sender information if available
-        if sender:
-            sender_data = self._extract_user_data(sender)
-            if sender_data:
-                await self.db.upsert_user(sender_data)
+        # Sender information is saved with the batch, see _commit_batch()
+        sender_data = self._extract_user_data(sender) if sender else None
 
         # Extract message data
         # v6.0.0: media_type, media_id, media_path removed - media stored in separate table
@@ -2599,6 +2600,9 @@ class TelegramBackup:
                 if media_result:
                     message_data["_media_data"] = media_result
 
+        if sender_data:
+            message_data["_sender_data"] = sender_data
+
         # Extract reactions (per-emoji aggregate snapshot). Reconciled after the
         # message is inserted; see DatabaseAdapter.reconcile_reactions (#219).
         message_data["reactions"] = extract_reactions(getattr(message, "reactions", None))
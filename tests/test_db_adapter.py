@@ -4,6 +4,7 @@ import json
 import os
 import sys
 from datetime import UTC, datetime
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -11,7 +12,7 @@ import pytest
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 from src.db.adapter import DatabaseAdapter, _strip_tz, retry_on_locked
-from src.db.models import Message
+from src.db.models import Chat, Message
 
 # ============================================================
 # _strip_tz helper
@@ -632,21 +633,22 @@ class TestChatOperations:
         db_manager, mock_session = _make_mock_db_manager()
         adapter = DatabaseAdapter(db_manager)
 
-        mock_chat = MagicMock()
-        mock_chat.id = 42
-        mock_chat.type = "private"
-        mock_chat.title = "Found Chat"
-        mock_chat.username = "user42"
-        mock_chat.first_name = "First"
-        mock_chat.last_name = "Last"
-        mock_chat.phone = "+1234"
-        mock_chat.description = "desc"
-        mock_chat.participants_count = 2
-        mock_chat.is_forum = 0
-        mock_chat.is_archived = 0
+        chat_row = {
+            "id": 42,
+            "type": "private",
+            "title": "Found Chat",
+            "username": "user42",
+            "first_name": "First",
+            "last_name": "Last",
+            "phone": "+1234",
+            "description": "desc",
+            "participants_count": 2,
+            "is_forum": 0,
+            "is_archived": 0,
+        }
 
         mock_result = MagicMock()
-        mock_result.scalar_one_or_none.return_value = mock_chat
+        mock_result.mappings.return_value.one_or_none.return_value = chat_row
         mock_session.execute.return_value = mock_result
 
         result = await adapter.get_chat_by_id(42)
@@ -662,7 +664,7 @@ class TestChatOperations:
         adapter = DatabaseAdapter(db_manager)
 
         mock_result = MagicMock()
-        mock_result.scalar_one_or_none.return_value = None
+        mock_result.mappings.return_value.one_or_none.return_value = None
         mock_session.execute.return_value = mock_result
 
         result = await adapter.get_chat_by_id(9999)
@@ -746,16 +748,17 @@ class TestUserOperations:
         db_manager, mock_session = _make_mock_db_manager()
         adapter = DatabaseAdapter(db_manager)
 
-        mock_user = MagicMock()
-        mock_user.id = 100
-        mock_user.username = "alice"
-        mock_user.first_name = "Alice"
-        mock_user.last_name = "Smith"
-        mock_user.phone = "+1111"
-        mock_user.is_bot = 0
+        user_row = {
+            "id": 100,
+            "username": "alice",
+            "first_name": "Alice",
+            "last_name": "Smith",
+            "phone": "+1111",
+            "is_bot": 0,
+        }
 
         mock_result = MagicMock()
-        mock_result.scalar_one_or_none.return_value = mock_user
+        mock_result.mappings.return_value.one_or_none.return_value = user_row
         mock_session.execute.return_value = mock_result
 
         result = await adapter.get_user_by_id(100)
@@ -771,12 +774,148 @@ class TestUserOperations:
         adapter = DatabaseAdapter(db_manager)
 
         mock_result = MagicMock()
-        mock_result.scalar_one_or_none.return_value = None
+        mock_result.mappings.return_value.one_or_none.return_value = None
         mock_session.execute.return_value = mock_result
 
         result = await adapter.get_user_by_id(9999)
         assert result is None
 
+    @pytest.mark.asyncio
+    async def test_upsert_users_batch_uses_one_statement_and_commit(self):
+        """upsert_users_batch writes every user with one multi-row upsert."""
+        db_manager, mock_session = _make_mock_db_manager(is_sqlite=True)
+        adapter = DatabaseAdapter(db_manager)
+
+        await adapter.upsert_users_batch([{"id": 1, "username": "a"}, {"id": 2, "username": "b"}])
+
+        mock_session.execute.assert_awaited_once()
+        mock_session.commit.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_upsert_users_batch_empty_list_is_noop(self):
+        """upsert_users_batch with no users never opens a session."""
+        db_manager, mock_session = _make_mock_db_manager(is_sqlite=True)
+        adapter = DatabaseAdapter(db_manager)
+
+        await adapter.upsert_users_batch([])
+
+        mock_session.execute.assert_not_awaited()
+        mock_session.commit.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_upsert_user_skips_unchanged_rows_real_sqlite(self, tmp_path):
+        """Re-upserting an identical user leaves updated_at alone; a real change still applies."""
+        from sqlalchemy import select
+
+        from src.db.base import DatabaseManager
+        from src.db.models import User
+
+        db_manager = DatabaseManager(f"sqlite:///{tmp_path / 'users.db'}")
+        await db_manager.init()
+        adapter = DatabaseAdapter(db_manager)
+
+        async def stored():
+            async with db_manager.async_session_factory() as session:
+                row = (await session.execute(select(User.username, User.updated_at).where(User.id == 5))).one()
+                return row.username, row.updated_at
+
+        try:
+            await adapter.upsert_user({"id": 5, "username": "ann", "first_name": "Ann"})
+            _, first_stamp = await stored()
+
+            await adapter.upsert_users_batch([{"id": 5, "username": "ann", "first_name": "Ann"}])
+            assert await stored() == ("ann", first_stamp)
+
+            # A repeated id in one batch keeps the last snapshot (and must not trip
+            # PostgreSQL's "cannot affect row a second time")
+            await adapter.upsert_users_batch(
+                [
+                    {"id": 6, "username": "first"},
+                    {"id": 5, "username": "ann", "first_name": "Ann"},
+                    {"id": 6, "username": "last"},
+                ]
+            )
+            assert await adapter.get_user_by_id(6) == {
+                "id": 6,
+                "username": "last",
+                "first_name": None,
+                "last_name": None,
+                "phone": None,
+                "is_bot": 0,
+            }
+            assert await stored() == ("ann", first_stamp)
+
+            await adapter.upsert_user({"id": 5, "username": "ann2", "first_name": "Ann"})
+            username, stamp = await stored()
+            assert username == "ann2"
+            assert stamp > first_stamp
+        finally:
+            await db_manager.close()
+
+    @pytest.mark.asyncio
+    async def test_single_row_getters_return_plain_dicts_real_sqlite(self, tmp_path):
+        """get_chat_by_id/get_user_by_id/get_media_for_chat return exactly their column dicts."""
+        from src.db.base import DatabaseManager
+
+        db_manager = DatabaseManager(f"sqlite:///{tmp_path / 'getters.db'}")
+        await db_manager.init()
+        adapter = DatabaseAdapter(db_manager)
+        try:
+            await adapter.upsert_chat({"id": 7, "type": "group", "title": "Group"})
+            await adapter.upsert_user({"id": 70, "username": "bob", "first_name": "Bob"})
+            await adapter.insert_media(
+                {
+                    "id": "m1",
+                    "message_id": 1,
+                    "chat_id": 7,
+                    "type": "photo",
+                    "file_path": "/m/p.jpg",
+                    "downloaded": True,
+                }
+            )
+
+            chat = await adapter.get_chat_by_id(7)
+            user = await adapter.get_user_by_id(70)
+            media = await adapter.get_media_for_chat(7)
+
+            assert type(chat) is dict
+            assert chat["title"] == "Group"
+            assert set(chat) == {
+                "id",
+                "type",
+                "title",
+                "username",
+                "first_name",
+                "last_name",
+                "phone",
+                "description",
+                "participants_count",
+                "is_forum",
+                "is_archived",
+            }
+            assert user == {
+                "id": 70,
+                "username": "bob",
+                "first_name": "Bob",
+                "last_name": None,
+                "phone": None,
+                "is_bot": 0,
+            }
+            assert media == [
+                {
+                    "id": "m1",
+                    "message_id": 1,
+                    "chat_id": 7,
+                    "type": "photo",
+                    "file_path": "/m/p.jpg",
+                    "file_size": None,
+                    "downloaded": 1,
+                }
+            ]
+            assert await adapter.get_chat_by_id(8) is None
+        finally:
+            await db_manager.close()
+
 
 # ============================================================
 # Message operations
@@ -832,18 +971,24 @@ class TestMessageOperations:
         mock_session.commit.assert_not_awaited()
 
     @pytest.mark.asyncio
-    async def test_insert_messages_batch_processes_multiple(self):
-        """insert_messages_batch processes each message and commits once."""
+    async def test_insert_messages_batch_inserts_new_rows_in_one_statement(self):
+        """insert_messages_batch inserts new messages with one multi-row INSERT and commits once."""
         db_manager, mock_session = _make_mock_db_manager(is_sqlite=True)
         adapter = DatabaseAdapter(db_manager)
 
+        mock_result = MagicMock()
+        mock_result.__iter__.return_value = iter(
+            [SimpleNamespace(id=1, chat_id=100), SimpleNamespace(id=2, chat_id=100)]
+        )
+        mock_session.execute.return_value = mock_result
+
         messages = [
             {"id": 1, "chat_id": 100, "date": datetime(2025, 1, 1), "text": "msg1"},
             {"id": 2, "chat_id": 100, "date": datetime(2025, 1, 2), "text": "msg2"},
         ]
         await adapter.insert_messages_batch(messages)
 
-        assert mock_session.execute.await_count == 2
+        mock_session.execute.assert_awaited_once()
         mock_session.commit.assert_awaited_once()
 
     @pytest.mark.asyncio
@@ -1060,6 +1205,33 @@ class TestMediaOperations:
         mock_session.execute.assert_awaited_once()
         mock_session.commit.assert_awaited_once()
 
+    @pytest.mark.asyncio
+    async def test_insert_media_batch_executes_each_and_commits_once(self):
+        """insert_media_batch upserts every record in one transaction."""
+        db_manager, mock_session = _make_mock_db_manager(is_sqlite=True)
+        adapter = DatabaseAdapter(db_manager)
+
+        await adapter.insert_media_batch(
+            [
+                {"id": "file_a", "type": "photo", "downloaded": True},
+                {"id": "file_b", "type": "video"},
+            ]
+        )
+
+        assert mock_session.execute.await_count == 2
+        mock_session.commit.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_insert_media_batch_empty_list_is_noop(self):
+        """insert_media_batch with no records never opens a session."""
+        db_manager, mock_session = _make_mock_db_manager(is_sqlite=True)
+        adapter = DatabaseAdapter(db_manager)
+
+        await adapter.insert_media_batch([])
+
+        mock_session.execute.assert_not_awaited()
+        mock_session.commit.assert_not_awaited()
+
     @pytest.mark.asyncio
     async def test_delete_media_for_chat_returns_rowcount(self):
         """delete_media_for_chat returns the number of deleted rows."""
@@ -1383,10 +1555,8 @@ class TestSettingsOperations:
         db_manager, mock_session = _make_mock_db_manager()
         adapter = DatabaseAdapter(db_manager)
 
-        mock_row = MagicMock()
-        mock_row.value = "dark"
         mock_result = MagicMock()
-        mock_result.scalar_one_or_none.return_value = mock_row
+        mock_result.scalar_one_or_none.return_value = "dark"
         mock_session.execute.return_value = mock_result
 
         result = await adapter.get_setting("theme")
@@ -1415,19 +1585,19 @@ class TestPinnedMessageOperations:
     """Test sync_pinned_messages and update_message_pinned."""
 
     @pytest.mark.asyncio
-    async def test_sync_pinned_messages_unpins_all_then_pins_specified(self):
-        """sync_pinned_messages issues two updates (unpin all, pin specified) and commits."""
+    async def test_sync_pinned_messages_unpins_and_pins_in_one_update(self):
+        """sync_pinned_messages reconciles pins with a single CASE update and commits."""
         db_manager, mock_session = _make_mock_db_manager()
         adapter = DatabaseAdapter(db_manager)
 
         await adapter.sync_pinned_messages(100, [1, 2, 3])
 
-        assert mock_session.execute.await_count == 2
+        assert mock_session.execute.await_count == 1
         mock_session.commit.assert_awaited_once()
 
     @pytest.mark.asyncio
     async def test_sync_pinned_messages_only_unpins_when_empty_list(self):
-        """sync_pinned_messages with empty list only unpins, no pin update."""
+        """sync_pinned_messages with empty list issues the same single update."""
         db_manager, mock_session = _make_mock_db_manager()
         adapter = DatabaseAdapter(db_manager)
 
@@ -1690,26 +1860,24 @@ class TestGetChats:
     """Test get_chats with pagination, search, archived, and folder filters."""
 
     def _make_chat_row(self, chat_id=1, title="Chat", last_message_date=None):
-        """Build a fake result row with .Chat and .last_message_date."""
-        chat = MagicMock()
-        chat.id = chat_id
-        chat.type = "group"
-        chat.title = title
-        chat.username = None
-        chat.first_name = None
-        chat.last_name = None
-        chat.phone = None
-        chat.description = None
-        chat.participants_count = 5
-        chat.is_forum = 0
-        chat.is_archived = 0
-        chat.last_synced_message_id = None
-        chat.created_at = None
-        chat.updated_at = None
-        row = MagicMock()
-        row.Chat = chat
-        row.last_message_date = last_message_date
-        return row
+        """Build a fake result mapping: the chat columns plus last_message_date."""
+        return {
+            "id": chat_id,
+            "type": "group",
+            "title": title,
+            "username": None,
+            "first_name": None,
+            "last_name": None,
+            "phone": None,
+            "description": None,
+            "participants_count": 5,
+            "is_forum": 0,
+            "is_archived": 0,
+            "last_synced_message_id": None,
+            "created_at": None,
+            "updated_at": None,
+            "last_message_date": last_message_date,
+        }
 
     @pytest.mark.asyncio
     async def test_get_chats_returns_list_of_dicts(self):
@@ -1719,7 +1887,7 @@ class TestGetChats:
 
         row = self._make_chat_row(chat_id=100, title="My Group")
         mock_result = MagicMock()
-        mock_result.__iter__ = MagicMock(return_value=iter([row]))
+        mock_result.mappings.return_value = [row]
         mock_session.execute.return_value = mock_result
 
         result = await adapter.get_all_chats()
@@ -1728,6 +1896,33 @@ class TestGetChats:
         assert result[0]["title"] == "My Group"
         assert "last_message_date" in result[0]
 
+    @pytest.mark.asyncio
+    async def test_get_chats_orders_by_last_message_date_real_sqlite(self, tmp_path):
+        """Chats are ordered newest-activity first with message-less chats last."""
+        from src.db.base import DatabaseManager
+
+        db_manager = DatabaseManager(f"sqlite:///{tmp_path / 'chats.db'}")
+        await db_manager.init()
+        adapter = DatabaseAdapter(db_manager)
+        try:
+            for chat_id in (1, 2, 3):
+                await adapter.upsert_chat({"id": chat_id, "type": "group", "title": f"Chat {chat_id}"})
+            await adapter.insert_messages_batch(
+                [
+                    {"id": 1, "chat_id": 1, "date": datetime(2025, 1, 1), "text": "old"},
+                    {"id": 2, "chat_id": 1, "date": datetime(2025, 3, 1), "text": "newer"},
+                    {"id": 1, "chat_id": 3, "date": datetime(2025, 2, 1), "text": "middle"},
+                ]
+            )
+
+            result = await adapter.get_all_chats()
+
+            assert [c["id"] for c in result] == [1, 3, 2]
+            assert [c["last_message_date"] for c in result] == [datetime(2025, 3, 1), datetime(2025, 2, 1), None]
+            assert set(result[0]) == {c.name for c in Chat.__table__.c} | {"last_message_date"}
+        finally:
+            await db_manager.close()
+
     @pytest.mark.asyncio
     async def test_get_chats_with_pagination(self):
         """get_all_chats respects limit and offset parameters."""
@@ -1804,7 +1999,7 @@ class TestGetChats:
         row1 = self._make_chat_row(chat_id=1, title="First")
         row2 = self._make_chat_row(chat_id=2, title="Second")
         mock_result = MagicMock()
-        mock_result.__iter__ = MagicMock(return_value=iter([row1, row2]))
+        mock_result.mappings.return_value = [row1, row2]
         mock_session.execute.return_value = mock_result
 
         result = await adapter.get_all_chats()
@@ -1888,19 +2083,15 @@ class TestGetChatStats:
         db_manager, mock_session = _make_mock_db_manager()
         adapter = DatabaseAdapter(db_manager)
 
-        # Three sequential execute calls: msg count, media count+size, date range
+        # Two sequential execute calls: msg count+date range, media count+size
         msg_result = MagicMock()
-        msg_result.scalar.return_value = 150
+        msg_result.one.return_value = (150, datetime(2024, 1, 1), datetime(2025, 6, 1))
 
         media_result = MagicMock()
         media_row = (25, 1048576)  # 25 files, 1MB total
         media_result.one.return_value = media_row
 
-        date_result = MagicMock()
-        date_row = (datetime(2024, 1, 1), datetime(2025, 6, 1))
-        date_result.one.return_value = date_row
-
-        mock_session.execute.side_effect = [msg_result, media_result, date_result]
+        mock_session.execute.side_effect = [msg_result, media_result]
 
         result = await adapter.get_chat_stats(100)
         assert result["chat_id"] == 100
@@ -1918,15 +2109,12 @@ class TestGetChatStats:
         adapter = DatabaseAdapter(db_manager)
 
         msg_result = MagicMock()
-        msg_result.scalar.return_value = 0
+        msg_result.one.return_value = (0, None, None)
 
         media_result = MagicMock()
         media_result.one.return_value = (0, 0)
 
-        date_result = MagicMock()
-        date_result.one.return_value = (None, None)
-
-        mock_session.execute.side_effect = [msg_result, media_result, date_result]
+        mock_session.execute.side_effect = [msg_result, media_result]
 
         result = await adapter.get_chat_stats(999)
         assert result["messages"] == 0
@@ -2019,8 +2207,8 @@ class TestGetMessagesPaginated:
         msg.is_outgoing = 0
         msg.is_pinned = 0
 
-        row = MagicMock()
-        row.Message = msg
+        # Flat Core row: message columns plus the joined user/media columns
+        row = msg
         row.first_name = "Alice"
         row.last_name = "Smith"
         row.username = "alice"
@@ -2223,8 +2411,8 @@ class TestGetMessagesPaginated:
         adapter = DatabaseAdapter(db_manager)
 
         row = self._make_message_row(msg_id=40)
-        row.Message.reply_to_msg_id = 39
-        row.Message.reply_to_text = None
+        row.reply_to_msg_id = 39
+        row.reply_to_text = None
 
         mock_result = MagicMock()
         mock_result.__iter__ = MagicMock(return_value=iter([row]))
@@ -2434,8 +2622,8 @@ class TestGetPinnedMessages:
         msg.is_outgoing = 0
         msg.is_pinned = 1
 
-        row = MagicMock()
-        row.Message = msg
+        # Flat Core row: message columns plus the joined user/media columns
+        row = msg
         row.first_name = "Bob"
         row.last_name = None
         row.username = "bob"
@@ -2493,8 +2681,8 @@ class TestGetPinnedMessages:
         msg.is_outgoing = 0
         msg.is_pinned = 1
 
-        row = MagicMock()
-        row.Message = msg
+        # Flat Core row: message columns plus the joined user/media columns
+        row = msg
         row.first_name = "Alice"
         row.last_name = None
         row.username = "alice"
@@ -2537,14 +2725,16 @@ class TestSyncFolderMembers:
         mock_session.execute.side_effect = [
             None,  # delete existing members
             existing_result,  # select existing chat IDs
+            None,  # insert members
         ]
 
         await adapter.sync_folder_members(folder_id=1, chat_ids=[100, 200, 300])
 
-        # delete + select existing = 2 execute calls
-        assert mock_session.execute.await_count == 2
-        # session.add called for each valid chat
-        assert mock_session.add.call_count == 2
+        # delete + select existing + one executemany insert = 3 execute calls
+        assert mock_session.execute.await_count == 3
+        insert_params = mock_session.execute.await_args_list[2].args[1]
+        assert insert_params == [{"folder_id": 1, "chat_id": 100}, {"folder_id": 1, "chat_id": 200}]
+        mock_session.add.assert_not_called()
         mock_session.commit.assert_awaited_once()
 
     @pytest.mark.asyncio
@@ -3232,8 +3422,8 @@ class TestFindMessageByDateWithJoins:
         msg.is_outgoing = 0
         msg.is_pinned = 0
 
-        row = MagicMock()
-        row.Message = msg
+        # Flat Core row: message columns plus the joined user/media columns
+        row = msg
         row.first_name = "Alice"
         row.last_name = None
         row.username = "alice"
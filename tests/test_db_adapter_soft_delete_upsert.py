@@ -274,6 +274,26 @@ async def test_mark_message_deleted_defaults_timestamp_when_none(sqlite_adapter)
     assert message.deleted_at is not None
 
 
+@pytest.mark.asyncio
+async def test_batched_deletes_touch_only_listed_messages_of_the_chat(sqlite_adapter):
+    """mark_messages_deleted / delete_messages scope one statement to (chat_id, ids)."""
+    for message_id in (30, 31, 32):
+        await sqlite_adapter.insert_message(
+            {"id": message_id, "chat_id": 400, "date": datetime(2026, 6, 25, 15, 0), "text": "keep"}
+        )
+    await sqlite_adapter.insert_message({"id": 30, "chat_id": 401, "date": datetime(2026, 6, 25, 15, 0), "text": "x"})
+
+    await sqlite_adapter.mark_messages_deleted(400, [30, 31, 999])
+    await sqlite_adapter.delete_messages(400, [32])
+    await sqlite_adapter.delete_messages(400, [])
+
+    assert (await _get_message(sqlite_adapter, 30, 400)).is_deleted == 1
+    assert (await _get_message(sqlite_adapter, 31, 400)).is_deleted == 1
+    assert (await _get_message(sqlite_adapter, 30, 401)).is_deleted == 0
+    async with sqlite_adapter.db_manager.async_session_factory() as session:
+        assert await session.get(Message, (32, 400)) is None
+
+
 @pytest.mark.asyncio
 async def test_get_messages_sync_data_excludes_soft_deleted(sqlite_adapter):
     """Soft-deleted rows are excluded from the sync set so they aren't re-checked."""
@@ -774,3 +794,41 @@ async def test_unchanged_reupsert_is_a_semantic_noop(sqlite_adapter):
     assert message.text == "stable"
     assert message.edit_date == datetime(2026, 6, 26, 13, 5)
     assert versions == []
+
+
+@pytest.mark.asyncio
+async def test_insert_messages_batch_mixes_new_existing_and_repeated_rows(sqlite_adapter):
+    """The multi-row INSERT only claims genuinely new rows: existing messages and
+    repeats within the same batch still go through the per-row edit policy."""
+    await sqlite_adapter.insert_message({"id": 60, "chat_id": 400, "date": datetime(2026, 6, 27, 9, 0), "text": "v1"})
+
+    await sqlite_adapter.insert_messages_batch(
+        [
+            # Existing row, edited
+            {
+                "id": 60,
+                "chat_id": 400,
+                "date": datetime(2026, 6, 27, 9, 0),
+                "text": "v2",
+                "edit_date": datetime(2026, 6, 27, 9, 5),
+            },
+            # New row, then an edit of it later in the same batch
+            {"id": 61, "chat_id": 400, "date": datetime(2026, 6, 27, 9, 1), "text": "first"},
+            {
+                "id": 61,
+                "chat_id": 400,
+                "date": datetime(2026, 6, 27, 9, 1),
+                "text": "second",
+                "edit_date": datetime(2026, 6, 27, 9, 6),
+            },
+            # Plain new row
+            {"id": 62, "chat_id": 400, "date": datetime(2026, 6, 27, 9, 2), "text": "fresh"},
+        ]
+    )
+
+    assert (await _get_message(sqlite_adapter, 60, 400)).text == "v2"
+    assert [v.text for v in await _get_versions(sqlite_adapter, 60, 400)] == ["v1"]
+    assert (await _get_message(sqlite_adapter, 61, 400)).text == "second"
+    assert [v.text for v in await _get_versions(sqlite_adapter, 61, 400)] == ["first"]
+    assert (await _get_message(sqlite_adapter, 62, 400)).text == "fresh"
+    assert await _get_versions(sqlite_adapter, 62, 400) == []
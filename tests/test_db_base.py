@@ -311,6 +311,21 @@ class TestClose:
             # Should not raise
             await manager.close()
 
+    @pytest.mark.asyncio
+    async def test_sqlite_connections_are_memory_mapped_and_close_optimizes(self, tmp_path):
+        """New SQLite connections get mmap_size, and close() runs PRAGMA optimize without error."""
+        from sqlalchemy import text
+
+        manager = DatabaseManager(f"sqlite:///{tmp_path / 'pragmas.db'}")
+        await manager.init()
+        async with manager.engine.connect() as conn:
+            mmap_size = (await conn.execute(text("PRAGMA mmap_size"))).scalar()
+        assert mmap_size == 268435456
+
+        with patch("src.db.base.logger") as mock_logger:
+            await manager.close()
+        mock_logger.debug.assert_not_called()
+
 
 # ============================================================
 # health_check()
@@ -465,6 +480,39 @@ class TestInitPostgresql:
         call_kwargs = mock_create.call_args[1]
         assert call_kwargs["pool_size"] == 5
         assert call_kwargs["pool_pre_ping"] is True
+        assert call_kwargs["pool_recycle"] == -1
+
+    @pytest.mark.asyncio
+    async def test_init_postgresql_pool_settings_from_env(self):
+        """DB_POOL_PRE_PING / DB_POOL_RECYCLE tune the pool (e.g. behind PgBouncer)."""
+        manager = DatabaseManager(database_url="postgresql+asyncpg://u:p@localhost/db")
+
+        with (
+            patch.dict(os.environ, {"DB_POOL_PRE_PING": "false", "DB_POOL_RECYCLE": "60"}),
+            patch("src.db.base.create_async_engine") as mock_create,
+            patch("src.db.base.async_sessionmaker"),
+        ):
+            mock_create.return_value = AsyncMock()
+
+            await manager.init()
+
+        call_kwargs = mock_create.call_args[1]
+        assert call_kwargs["pool_pre_ping"] is False
+        assert call_kwargs["pool_recycle"] == 60
+
+    @pytest.mark.asyncio
+    async def test_init_sqlite_reuses_pooled_connections(self, tmp_path):
+        """Consecutive SQLite sessions check out the same connection instead of reopening the file."""
+        manager = DatabaseManager(f"sqlite:///{tmp_path / 'pool.db'}")
+        await manager.init()
+        try:
+            async with manager.engine.connect() as conn:
+                first = (await conn.get_raw_connection()).driver_connection
+            async with manager.engine.connect() as conn:
+                second = (await conn.get_raw_connection()).driver_connection
+            assert first is second
+        finally:
+            await manager.close()
 
 
 # ============================================================
@@ -4,7 +4,7 @@ Tests for the real-time listener module.
 
 import asyncio
 from datetime import UTC
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from telethon import events
@@ -46,6 +46,7 @@ class TestTelegramListener:
         db.get_all_chats = AsyncMock(return_value=[{"id": -1001234567890}, {"id": 123456789}, {"id": -987654321}])
         db.update_message_text = AsyncMock(return_value="applied")
         db.delete_message = AsyncMock()
+        db.delete_messages = AsyncMock()
         db.resolve_message_chat_id = AsyncMock(return_value=-1001234567890)
         db.close = AsyncMock()
         return db
@@ -92,8 +93,10 @@ class TestTelegramListener:
         """Test _get_marked_id handles various inputs."""
         listener = TelegramListener(mock_config, mock_db)
 
-        # Test with raw integer
-        assert listener._get_marked_id(123456789) == 123456789
+        # Test with raw integer (returned as-is, no get_peer_id dispatch)
+        with patch("src.listener.get_peer_id") as mock_get_peer_id:
+            assert listener._get_marked_id(-1001234567890) == -1001234567890
+        mock_get_peer_id.assert_not_called()
 
         # Test with object having id attribute
         mock_entity = MagicMock()
@@ -267,7 +270,9 @@ class TestEventHandlers:
         db.get_all_chats = AsyncMock(return_value=[])
         db.update_message_text = AsyncMock(return_value="applied")
         db.delete_message = AsyncMock()
+        db.delete_messages = AsyncMock()
         db.mark_message_deleted = AsyncMock()
+        db.mark_messages_deleted = AsyncMock()
         db.resolve_message_chat_id = AsyncMock(return_value=None)
         db.upsert_chat = AsyncMock()
         db.upsert_user = AsyncMock()
@@ -408,6 +413,7 @@ class TestEventHandlers:
         # Chat not in tracked set, but in global include list
         new_chat_id = -1009999999
         full_config.global_include_ids = {new_chat_id}
+        listener._all_include_ids = frozenset({new_chat_id})
         listener._tracked_chat_ids = set()  # Empty
 
         event = MagicMock()
@@ -431,6 +437,24 @@ class TestEventHandlers:
 
         assert new_chat_id in listener._tracked_chat_ids
 
+    def test_on_new_message_whitelist_mode_skips_tracked_but_unlisted_chat(self, listener_with_handlers, full_config):
+        """The tracked-chat fast path must not bypass whitelist mode, which ignores tracking."""
+        listener, handlers = listener_with_handlers
+        handler = handlers[events.NewMessage]
+        full_config.whitelist_mode = True
+        full_config.chat_ids = {-1009999999}
+        listener._tracked_chat_ids = {99999}
+
+        event = MagicMock()
+        event.chat_id = 99999
+        event.message = MagicMock()
+        event.message.reply_to = None
+
+        asyncio.run(handler(event))
+
+        assert listener.stats["new_messages_received"] == 0
+        listener.db.insert_message.assert_not_called()
+
     def test_on_new_message_increments_error_on_exception(self, listener_with_handlers):
         """Test error counter increments when handler raises an exception."""
         listener, handlers = listener_with_handlers
@@ -583,7 +607,7 @@ class TestEventHandlers:
 
         assert listener.stats["deletions_skipped"] == 3
         assert listener.stats["deletions_received"] == 0
-        listener.db.delete_message.assert_not_called()
+        listener.db.delete_messages.assert_not_called()
 
     def test_on_message_deleted_skips_untracked_chat(self, listener_with_handlers):
         """Test delete handler ignores deletions from untracked chats."""
@@ -597,10 +621,10 @@ class TestEventHandlers:
         asyncio.run(handler(event))
 
         assert listener.stats["deletions_received"] == 0
-        listener.db.delete_message.assert_not_called()
+        listener.db.delete_messages.assert_not_called()
 
     def test_on_message_deleted_applies_deletion(self, listener_with_handlers):
-        """Test delete handler applies each deletion to the database."""
+        """Test delete handler applies the event's deletions in one batched call."""
         listener, handlers = listener_with_handlers
         handler = handlers[events.MessageDeleted]
 
@@ -612,8 +636,8 @@ class TestEventHandlers:
 
         assert listener.stats["deletions_received"] == 2
         assert listener.stats["deletions_applied"] == 2
-        assert listener.db.delete_message.call_count == 2
-        listener.db.mark_message_deleted.assert_not_called()
+        listener.db.delete_messages.assert_called_once_with(-1001234567890, [10, 20])
+        listener.db.mark_messages_deleted.assert_not_called()
 
     def test_on_message_deleted_soft_marks_deletion(self, listener_with_handlers, full_config):
         """DELETION_MODE=soft marks messages deleted instead of removing them."""
@@ -627,8 +651,8 @@ class TestEventHandlers:
 
         asyncio.run(handler(event))
 
-        listener.db.mark_message_deleted.assert_called_once()
-        listener.db.delete_message.assert_not_called()
+        listener.db.mark_messages_deleted.assert_called_once()
+        listener.db.delete_messages.assert_not_called()
 
     def test_on_message_deleted_soft_notify_payload(self, listener_with_handlers, full_config):
         """Soft deletion emits a 'delete' notification carrying deletion_mode=soft and deleted_at."""
@@ -700,7 +724,7 @@ class TestEventHandlers:
         asyncio.run(handler(event))
 
         assert listener.stats["deletions_applied"] == 0
-        listener.db.delete_message.assert_not_called()
+        listener.db.delete_messages.assert_not_called()
 
     def test_on_message_deleted_increments_error_on_exception(self, listener_with_handlers):
         """Test error counter increments when delete handler raises."""
@@ -754,6 +778,7 @@ class TestStatsTracking:
         db.get_all_chats = AsyncMock(return_value=[])
         db.update_message_text = AsyncMock(return_value="applied")
         db.delete_message = AsyncMock()
+        db.delete_messages = AsyncMock()
         db.resolve_message_chat_id = AsyncMock(return_value=None)
         db.upsert_chat = AsyncMock()
         db.upsert_user = AsyncMock()
@@ -987,6 +1012,7 @@ class TestListenerEventHandling:
         db.get_all_chats = AsyncMock(return_value=[])
         db.update_message_text = AsyncMock(return_value="applied")
         db.delete_message = AsyncMock()
+        db.delete_messages = AsyncMock()
         db.close = AsyncMock()
         return db
 
@@ -20,6 +20,7 @@ Covers lines missing from the initial test_listener.py:
 
 import asyncio
 import os
+import time
 from datetime import datetime, timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -78,7 +79,9 @@ def _make_db():
     db.get_all_chats = AsyncMock(return_value=[])
     db.update_message_text = AsyncMock(return_value="applied")
     db.delete_message = AsyncMock()
+    db.delete_messages = AsyncMock()
     db.mark_message_deleted = AsyncMock()
+    db.mark_messages_deleted = AsyncMock()
     db.resolve_message_chat_id = AsyncMock(return_value=None)
     db.upsert_chat = AsyncMock()
     db.upsert_user = AsyncMock()
@@ -147,7 +150,7 @@ class TestMassOperationProtectorAdvanced:
     def test_is_blocked_returns_true_while_block_active(self):
         """is_blocked returns True for a chat with an active block."""
         protector = MassOperationProtector(threshold=5, window_seconds=30)
-        future = datetime.now() + timedelta(hours=1)
+        future = time.monotonic() + 3600
         protector._blocked[12345] = (future, "test reason", 5)
 
         blocked, reason = protector.is_blocked(12345)
@@ -157,7 +160,7 @@ class TestMassOperationProtectorAdvanced:
     def test_is_blocked_expires_old_block(self):
         """is_blocked removes expired blocks and returns False."""
         protector = MassOperationProtector(threshold=5, window_seconds=30)
-        past = datetime.now() - timedelta(seconds=1)
+        past = time.monotonic() - 1
         protector._blocked[12345] = (past, "old reason", 3)
 
         blocked, reason = protector.is_blocked(12345)
@@ -175,8 +178,8 @@ class TestMassOperationProtectorAdvanced:
         from collections import deque
 
         protector = MassOperationProtector(threshold=5, window_seconds=10)
-        old_ts = datetime.now() - timedelta(seconds=20)
-        recent_ts = datetime.now()
+        old_ts = time.monotonic() - 20
+        recent_ts = time.monotonic()
         protector._operation_history[100] = deque([old_ts, recent_ts])
 
         count = protector._count_ops_in_window(100)
@@ -186,8 +189,8 @@ class TestMassOperationProtectorAdvanced:
     def test_get_blocked_chats_filters_expired(self):
         """get_blocked_chats only returns currently-active blocks."""
         protector = MassOperationProtector(threshold=5, window_seconds=30)
-        future = datetime.now() + timedelta(hours=1)
-        past = datetime.now() - timedelta(seconds=1)
+        future = time.monotonic() + 3600
+        past = time.monotonic() - 1
         protector._blocked[100] = (future, "active", 5)
         protector._blocked[200] = (past, "expired", 3)
 
@@ -198,12 +201,30 @@ class TestMassOperationProtectorAdvanced:
     def test_get_stats_includes_currently_blocked_count(self):
         """get_stats counts chats that are currently blocked."""
         protector = MassOperationProtector(threshold=5, window_seconds=30)
-        future = datetime.now() + timedelta(hours=1)
+        future = time.monotonic() + 3600
         protector._blocked[100] = (future, "active", 5)
 
         stats = protector.get_stats()
         assert stats["currently_blocked"] == 1
 
+    def test_get_stats_reaps_expired_blocks_from_heap(self):
+        """Expired blocks are popped off the expiry heap; a replaced block survives its stale entry."""
+        protector = MassOperationProtector(threshold=1, window_seconds=30)
+        for chat_id in (100, 200):
+            protector.check_operation(chat_id, "deletion")
+            protector.check_operation(chat_id, "deletion")
+        assert protector.get_stats()["currently_blocked"] == 2
+
+        # Chat 200 was re-blocked later; its original heap entry is now stale.
+        later = time.monotonic() + 3600
+        protector._blocked[200] = (later, "re-blocked", 1)
+        with patch("src.listener.time.monotonic", return_value=time.monotonic() + 31):
+            stats = protector.get_stats()
+
+        assert stats["currently_blocked"] == 1
+        assert list(protector._blocked) == [200]
+        assert protector._block_expiry_heap == []
+
     def test_check_operation_records_and_counts(self):
         """check_operation records timestamps and uses sliding window correctly."""
         protector = MassOperationProtector(threshold=2, window_seconds=60)
@@ -220,6 +241,15 @@ class TestMassOperationProtectorAdvanced:
         assert protector.stats["rate_limits_triggered"] == 1
         assert 100 in protector.stats["chats_rate_limited"]
 
+    def test_operation_history_is_capped_one_past_threshold(self):
+        """Per-chat history is a ring: it never holds more than threshold + 1 timestamps."""
+        protector = MassOperationProtector(threshold=3, window_seconds=60)
+        for _ in range(10):
+            protector._record_operation(100)
+
+        assert len(protector._operation_history[100]) == 4
+        assert protector._count_ops_in_window(100) > protector.threshold
+
     def test_check_operation_blocked_chat_increments_blocked_stats(self):
         """Subsequent operations on an already-blocked chat increment operations_blocked."""
         protector = MassOperationProtector(threshold=1, window_seconds=60)
@@ -1305,7 +1335,7 @@ class TestOnMessageDeletedRateLimiting:
 
         await handler(event)
 
-        db.delete_message.assert_not_called()
+        db.delete_messages.assert_not_called()
 
     async def test_known_chat_rate_limited_increments_discarded(self):
         """When chat_id is known and rate-limited, operations_discarded is incremented."""
@@ -1345,7 +1375,7 @@ class TestOnMessageDeletedRateLimiting:
         await handler(event)
 
         # The deletion is not applied
-        db.delete_message.assert_not_called()
+        db.delete_messages.assert_not_called()
 
     async def test_second_should_process_check_on_known_chat(self):
         """When chat_id is known but not tracked, inner should_process_chat check skips."""
@@ -1365,7 +1395,7 @@ class TestOnMessageDeletedRateLimiting:
         await handler(event)
 
         # Both messages skip the inner should_process_chat check
-        db.delete_message.assert_not_called()
+        db.delete_messages.assert_not_called()
 
 
 # ===========================================================================
@@ -1888,7 +1918,7 @@ class TestLogStats:
         listener.stats["start_time"] = datetime.now() - timedelta(minutes=30)
 
         # Add a blocked chat to protector
-        future = datetime.now() + timedelta(hours=1)
+        future = time.monotonic() + 3600
         listener._protector._blocked[12345] = (future, "rate limited", 15)
 
         # Should not raise
@@ -2156,7 +2186,7 @@ class TestOnMessageDeletedInnerProcessCheck:
 
         await handler(event)
 
-        db.delete_message.assert_not_called()
+        db.delete_messages.assert_not_called()
 
 
 # ===========================================================================
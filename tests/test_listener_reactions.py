@@ -147,6 +147,28 @@ async def test_notify_update_maps_reaction_type():
     assert listener._notifier.notify.await_args[0][0] == NotificationType.REACTION
 
 
+@pytest.mark.asyncio
+async def test_flush_loop_idles_until_a_snapshot_is_buffered():
+    listener, handler, db = _build()
+    listener._flush_reactions = AsyncMock(wraps=listener._flush_reactions)
+    listener._running = True
+    task = asyncio.create_task(listener._reaction_flush_loop())
+    try:
+        await asyncio.sleep(0.05)  # several debounce windows with an empty buffer
+        listener._flush_reactions.assert_not_awaited()
+
+        await handler(_event(reactions=_reactions(("👍", 1))))
+        await asyncio.sleep(0.05)
+        db.reconcile_reactions.assert_awaited_once()
+        assert listener._reaction_pending == {}
+        assert not listener._reaction_wakeup.is_set()
+    finally:
+        listener._running = False
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+
 def _build_all(listen_reactions=True, listen_edits=True, listen_new_messages=True):
     """Build a listener exposing every captured handler by name (#221).
 
@@ -0,0 +1,58 @@
+"""Tests for Alembic migration 021 (messages.text trigram index, PostgreSQL only)."""
+
+import importlib.util
+import unittest
+from collections.abc import Callable
+from pathlib import Path
+from types import ModuleType
+
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy.engine import Connection
+
+_MIGRATION_PATH = (
+    Path(__file__).resolve().parent.parent / "alembic" / "versions" / "20260801_021_add_messages_text_trgm_index.py"
+)
+
+
+def _load_migration() -> ModuleType:
+    spec = importlib.util.spec_from_file_location("migration_021", _MIGRATION_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load migration 021")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _run(conn: Connection, func: Callable[[], None]) -> None:
+    context = MigrationContext.configure(conn)
+    with Operations.context(context):
+        func()
+
+
+class TestMigration021(unittest.TestCase):
+    def test_revision_chain(self) -> None:
+        migration = _load_migration()
+        self.assertEqual(migration.revision, "021")
+        self.assertEqual(migration.down_revision, "020")
+
+    def test_sqlite_upgrade_and_downgrade_are_noops(self) -> None:
+        migration = _load_migration()
+        engine = sa.create_engine("sqlite://")
+        with engine.connect() as conn:
+            conn.execute(sa.text("CREATE TABLE messages (id BIGINT NOT NULL, chat_id BIGINT NOT NULL, text TEXT)"))
+
+            _run(conn, migration.upgrade)
+            _run(conn, migration.upgrade)
+            self.assertEqual(sa.inspect(conn).get_indexes("messages"), [])
+
+            _run(conn, migration.downgrade)
+            self.assertEqual(sa.inspect(conn).get_indexes("messages"), [])
+
+    def test_index_is_not_declared_on_the_orm_model(self) -> None:
+        """create_all() must never build this index (it would be a btree on SQLite)."""
+        from src.db.models import Message
+
+        migration = _load_migration()
+        self.assertNotIn(migration.INDEX_NAME, {ix.name for ix in Message.__table__.indexes})
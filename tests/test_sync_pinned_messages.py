@@ -0,0 +1,61 @@
+"""DatabaseAdapter.sync_pinned_messages — single-statement pin reconciliation."""
+
+import os
+import sys
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.db.adapter import DatabaseAdapter
+from src.db.base import DatabaseManager
+from src.db.models import Chat, Message
+
+CHAT_ID = -1001111111111
+OTHER_CHAT_ID = -1002222222222
+
+
+@pytest.fixture
+async def sqlite_adapter(tmp_path):
+    manager = DatabaseManager(f"sqlite:///{tmp_path / 'telegram_archive.db'}")
+    await manager.init()
+    try:
+        adapter = DatabaseAdapter(manager)
+        async with manager.async_session_factory() as session:
+            for chat_id in (CHAT_ID, OTHER_CHAT_ID):
+                session.add(Chat(id=chat_id, type="channel", title="c"))
+                for msg_id, pinned in ((1, 1), (2, 0), (3, 0), (4, 1)):
+                    session.add(Message(id=msg_id, chat_id=chat_id, date=datetime(2026, 1, msg_id), is_pinned=pinned))
+            await session.commit()
+        yield adapter
+    finally:
+        await manager.close()
+
+
+async def _pinned_ids(adapter: DatabaseAdapter, chat_id: int) -> list[int]:
+    async with adapter.db_manager.async_session_factory() as session:
+        result = await session.execute(
+            select(Message.id).where(Message.chat_id == chat_id, Message.is_pinned == 1).order_by(Message.id)
+        )
+        return list(result.scalars())
+
+
+async def test_pins_listed_and_unpins_the_rest(sqlite_adapter):
+    await sqlite_adapter.sync_pinned_messages(CHAT_ID, [2, 4, 99])
+
+    assert await _pinned_ids(sqlite_adapter, CHAT_ID) == [2, 4]
+
+
+async def test_empty_list_clears_all_pins(sqlite_adapter):
+    await sqlite_adapter.sync_pinned_messages(CHAT_ID, [])
+
+    assert await _pinned_ids(sqlite_adapter, CHAT_ID) == []
+
+
+async def test_other_chats_are_untouched(sqlite_adapter):
+    await sqlite_adapter.sync_pinned_messages(CHAT_ID, [3])
+
+    assert await _pinned_ids(sqlite_adapter, CHAT_ID) == [3]
+    assert await _pinned_ids(sqlite_adapter, OTHER_CHAT_ID) == [1, 4]
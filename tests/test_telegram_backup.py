@@ -492,7 +492,7 @@ class TestBackupCheckpointing(unittest.TestCase):
             loop.close()
 
         backup.db.insert_messages_batch.assert_awaited_once_with(batch)
-        backup.db.insert_media.assert_awaited_once_with({"file_path": "/a.jpg"})
+        backup.db.insert_media_batch.assert_awaited_once_with([{"file_path": "/a.jpg"}])
         # Reconciled once per message: empty snapshot for msg 1, the aggregate for msg 2.
         self.assertEqual(backup.db.reconcile_reactions.await_count, 2)
         backup.db.reconcile_reactions.assert_any_await(1, 100, [], mark_removed=True)
@@ -1693,8 +1693,8 @@ class TestProcessMessage(unittest.TestCase):
         result = self._run(self.backup._process_message(msg, 100))
         self.assertEqual(result["text"], "")
 
-    def test_sender_data_upserted_when_sender_is_user(self):
-        """When sender is a User, upsert_user is called."""
+    def test_sender_data_attached_when_sender_is_user(self):
+        """When sender is a User, its data rides along for the batch upsert."""
         msg = self._make_message(8)
         user = MagicMock(spec=User)
         user.id = 42
@@ -1705,9 +1705,10 @@ class TestProcessMessage(unittest.TestCase):
         user.bot = False
         msg.sender = user
 
-        self._run(self.backup._process_message(msg, 100))
+        result = self._run(self.backup._process_message(msg, 100))
 
-        self.backup.db.upsert_user.assert_awaited_once()
+        self.assertEqual(result["_sender_data"]["id"], 42)
+        self.backup.db.upsert_user.assert_not_awaited()
 
     def test_sender_name_snapshot_prefers_trimmed_first_and_last_name(self):
         msg = self._make_message(80)
@@ -1972,15 +1973,32 @@ class TestCommitBatchReactions(unittest.TestCase):
         self.backup.db.reconcile_reactions.assert_not_awaited()
 
     def test_batch_with_no_media_skips_insert_media(self):
-        """Messages without _media_data do not call insert_media."""
+        """Messages without _media_data do not call insert_media_batch."""
         batch = [
             {"id": 5, "chat_id": 100, "reactions": []},
         ]
 
         self._run(self.backup._commit_batch(batch, 100))
 
+        self.backup.db.insert_media_batch.assert_not_awaited()
         self.backup.db.insert_media.assert_not_awaited()
 
+    def test_batch_upserts_senders_in_one_call(self):
+        """Every message's sender snapshot goes to a single upsert_users_batch call."""
+        batch = [
+            {"id": 1, "chat_id": 100, "_sender_data": {"id": 7, "username": "old"}},
+            {"id": 2, "chat_id": 100, "_sender_data": {"id": 8, "username": "other"}},
+            {"id": 3, "chat_id": 100, "_sender_data": {"id": 7, "username": "new"}},
+            {"id": 4, "chat_id": 100},
+        ]
+
+        self._run(self.backup._commit_batch(batch, 100))
+
+        self.backup.db.upsert_users_batch.assert_awaited_once_with(
+            [{"id": 7, "username": "old"}, {"id": 8, "username": "other"}, {"id": 7, "username": "new"}]
+        )
+        self.backup.db.upsert_user.assert_not_awaited()
+
 
 class TestBackupForumTopics(unittest.TestCase):
     """Test _backup_forum_topics with API path and skip filtering."""